@@ -1,14 +1,21 @@
+import asyncio
 from fastapi import FastAPI,Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response,JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.responses import HTMLResponse, RedirectResponse
 from uvicorn import run as app_run
 from typing import Optional
 from src.constants import APP_HOST,APP_PORT
-from src.pipline.prediction_pipeline import FossilAgeRegression,FossilPrediction
-from src.pipline.training_pipeline import TrainPipeline
+from src.logger import logging
+from src.exception import MyException
+from src.entity.config_entity import FossilPredictionConfig,ModelPusherConfig
+from src.pipline.prediction_pipeline import FossilAgeRegression,FossilRecord,FossilBatchPrediction
+from src.pipline.micro_batcher import PredictionBatcher
+from src.pipline.workers import inference_executor,training_executor,ExecutorBusyError
+from src.pipline.training_jobs import (TrainingJobStore,TrainingJobConflictError,run_training_job,
+                                      JOB_QUEUED,JOB_FAILED,ACTIVE_JOB_STATUSES)
 
 "FastApi app"
 app=FastAPI()
@@ -31,6 +38,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+"Coalesce concurrent single-row form predictions into one vectorized prediction"
+prediction_config=FossilPredictionConfig()
+prediction_batcher=PredictionBatcher(predict_fn=lambda dataframe: FossilAgeRegression(prediction_config).predict(dataframe),
+                                     max_wait_ms=prediction_config.batch_window_ms,
+                                     max_batch_size=prediction_config.batch_max_rows,
+                                     executor=inference_executor)
+
+"Training jobs are tracked in a SQLite store shared with the training worker process, opened at startup (not on import)"
+@app.on_event("startup")
+def open_training_job_store():
+    app.state.training_job_store=TrainingJobStore()
+    ## Jobs left active by a server process that is gone will never finish
+    app.state.training_job_store.fail_interrupted_jobs()
+
+"Readiness: GET /ready only reports ready once the model is loaded and warmed up"
+readiness={"ready":False,"attempts":0,"error":None,"warmup":None}
+
+async def warm_up_model():
+    "Retries until the model can be loaded (e.g. not pushed to S3 yet), the app keeps serving meanwhile."
+    model_predictor=FossilAgeRegression(prediction_config)
+    while not readiness["ready"]:
+        readiness["attempts"]+=1
+        try:
+            readiness["warmup"]=await asyncio.get_running_loop().run_in_executor(
+                None,model_predictor.warm_up,prediction_config.warmup_batch_rows)
+            readiness["ready"],readiness["error"]=True,None
+        except Exception as e:
+            readiness["error"]=f"{e}"
+            logging.error(f"Model warm-up attempt {readiness['attempts']} failed: {e}")
+            await asyncio.sleep(prediction_config.warmup_retry_interval)
+
+"Preload and warm up the served model in the background so the first requests do not pay the cold start"
+@app.on_event("startup")
+async def start_model_warm_up():
+    app.state.warm_up_task=asyncio.get_running_loop().create_task(warm_up_model())
+
+"Release the inference and training pools when the server stops"
+@app.on_event("shutdown")
+def shutdown_worker_pools():
+    warm_up_task=getattr(app.state,"warm_up_task",None)
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    inference_executor.shutdown(wait=False)
+    training_executor.shutdown(wait=False)
+
+def is_invalid_input(error:Exception)->bool:
+    """
+    MyException keeps the exception it wraps as its first argument: a ValueError/KeyError at the root
+    (e.g. an unknown category found by the encoder) means the request data cannot be scored.
+    """
+    while isinstance(error,MyException) and error.args and isinstance(error.args[0],Exception):
+        error=error.args[0]
+    return isinstance(error,(ValueError,KeyError))
+
 class FossiDataForm:
     def __init__(self,request:Request):
         self.request:Request=request
@@ -47,6 +108,10 @@ class FossiDataForm:
         self.fossil_size:Optional[float]=None
         self.fossil_weight:Optional[float]=None
 
+    async def get_fossil_record(self)->FossilRecord:
+        "Typed record of the submitted form, for the record-oriented prediction path."
+        return FossilRecord.from_mapping(await self.request.form())
+
     async def get_fossil_data(self):
         form=await self.request.form()
         self.uranium_lead_ratio= form.get("uranium_lead_ratio")
@@ -67,42 +132,59 @@ class FossiDataForm:
         "Renders the main HTML form page for fossil data input."
         return templates.TemplateResponse("index.html",{"request":request,"context":"Rendering"})
     
-    @app.get("/train")
-    async def trainRouteClient():
-        "Endpoint to initiate the model training pipeline."
+    ## POST only: a GET (link prefetch, crawler, page reload) must not start a training run, it gets a 405
+    ## Plain def: the SQLite calls may block (busy timeout), FastAPI runs these handlers in its threadpool
+    @app.post("/train", status_code=202)
+    def trainRouteClient(force: bool = False):
+        """
+        Endpoint to enqueue a run of the model training pipeline.
+        Returns the job id immediately, progress is reported by GET /train/{job_id}.
+        force: recompute every stage even if the stage cache holds artifacts for the same inputs.
+        """
+        training_job_store=app.state.training_job_store
         try:
-            train_pipeline=TrainPipeline()
-            train_pipeline.run_pipeline()
-            return Response("Training Successful!!")
-        except Exception as e:
-            return Response(f"Error Occured! {e}")
+            job_id=training_job_store.create_job(model_name=ModelPusherConfig.s3_model_key_path)
+        except TrainingJobConflictError as e:
+            return JSONResponse(status_code=409,content={"status": False, "error": f"{e}"})
+        try:
+            ## The pipeline runs in the training process pool so predictions keep being served meanwhile
+            future=training_executor.submit(run_training_job,job_id,training_job_store.file_path,force)
+        except ExecutorBusyError as e:
+            training_job_store.finish_job(job_id,status=JOB_FAILED,error=f"{e}")
+            return JSONResponse(status_code=429,content={"status": False, "error": f"{e}"})
+
+        def fail_crashed_job(future):
+            "The worker process may die before it reports the failure itself (e.g. out of memory)."
+            job=training_job_store.get_job(job_id)
+            if future.cancelled():
+                if job is not None and job["status"] in ACTIVE_JOB_STATUSES:
+                    training_job_store.finish_job(job_id,status=JOB_FAILED,error="Training job was cancelled")
+                return
+            if future.exception() is not None and job is not None and job["status"] in ACTIVE_JOB_STATUSES:
+                training_job_store.finish_job(job_id,status=JOB_FAILED,error=f"{future.exception()}")
+        future.add_done_callback(fail_crashed_job)
+        return {"status": True, "job_id": job_id, "job_status": JOB_QUEUED}
+
+    @app.get("/train/{job_id}")
+    def trainJobRouteClient(job_id: str):
+        "Reports the current stage, per-stage durations (seconds) and artifact paths of a training job."
+        job=app.state.training_job_store.get_job(job_id)
+        if job is None:
+            return JSONResponse(status_code=404,content={"status": False, "error": f"Unknown training job {job_id}"})
+        return job
         
     @app.post("/")
     async def predictRouteClient(request: Request):
         try:
             form = FossiDataForm(request)
-            await form.get_fossil_data()
-            fossil_data=FossilPrediction(
-                uranium_lead_ratio= form.uranium_lead_ratio,
-                carbon_14_ratio= form.carbon_14_ratio,
-                radioactive_decay_series= form.radioactive_decay_series,
-                stratigraphic_layer_depth= form.stratigraphic_layer_depth,
-                geological_period= form.geological_period,
-                paleomagnetic_data= form.paleomagnetic_data,
-                inclusion_of_other_fossils= form.inclusion_of_other_fossils,
-                isotopic_composition= form.isotopic_composition,
-                surrounding_rock_type= form.surrounding_rock_type,
-                stratigraphic_position= form.stratigraphic_position,
-                fossil_size= form.fossil_size,
-                fossil_weight= form.fossil_weight
-            )    
-            fossil_df=fossil_data.get_fossil_input_dataframe()
-
-            ##Initialize the prediction pipeline
-            model_predictor=FossilAgeRegression()
-
-            ## Make a prediction and retrieve the result
-            value=model_predictor.predict(dataframe=fossil_df)[0]
+            ## Typed record straight from the form: no FossilPrediction/DataFrame round trip
+            fossil_record=await form.get_fossil_record()
+        except ValueError as e:
+            ## Missing, non-numeric or non-finite (nan/inf) field values
+            return JSONResponse(status_code=400,content={"status": False, "error": f"{e}"})
+        try:
+            ## Make a prediction through the micro-batching queue and retrieve the result
+            value=(await prediction_batcher.predict([fossil_record]))[0]
 
             # Interpret the prediction result
             status=value
@@ -112,9 +194,51 @@ class FossiDataForm:
                 "index.html",
                 {"request": request, "context": status},
             )
+        except ExecutorBusyError as e:
+            return JSONResponse(status_code=429,content={"status": False, "error": f"{e}"})
         except Exception as e:
+            ## An unknown category only fails this request, the batcher re-predicts the others on their own
+            if is_invalid_input(e):
+                return JSONResponse(status_code=400,content={"status": False, "error": f"{e}"})
             return {"status": False, "error": f"{e}"}
 
+    @app.post("/predict/batch")
+    async def predictBatchRouteClient(request: Request):
+        """
+        Predicts the age of a batch of fossils in one call.
+        Accepts a JSON array of records or columnar JSON and returns all the ages in request order.
+        """
+        try:
+            payload=await request.json()
+            fossil_df=FossilBatchPrediction(payload=payload).get_fossil_input_dataframe()
+        except Exception as e:
+            return JSONResponse(status_code=400,content={"status": False, "error": f"{e}"})
+        try:
+            ## One vectorized transform_predict call for the whole batch
+            model_predictor=FossilAgeRegression(prediction_config)
+            predictions=await inference_executor.run(model_predictor.predict,fossil_df)
+            return {"status": True, "count": len(predictions), "predictions": [float(value) for value in predictions]}
+        except ExecutorBusyError as e:
+            return JSONResponse(status_code=429,content={"status": False, "error": f"{e}"})
+        except Exception as e:
+            ## Unknown categories are only found by the served model's encoder
+            status_code=400 if is_invalid_input(e) else 500
+            return JSONResponse(status_code=status_code,content={"status": False, "error": f"{e}"})
+
+    @app.get("/ready")
+    async def readyRouteClient():
+        "Readiness probe: 200 once the model is loaded and warmed up, 503 before (with the last warm-up error)."
+        if readiness["ready"]:
+            return {"status": True, "attempts": readiness["attempts"], "warmup": readiness["warmup"]}
+        return JSONResponse(status_code=503,content={"status": False, "attempts": readiness["attempts"],
+                                                     "error": readiness["error"]})
+
+    @app.get("/metrics")
+    async def metricsRouteClient():
+        "Micro-batching statistics (batch sizes, queue wait times) and prediction cache hit/miss counters."
+        return {"prediction_batcher": prediction_batcher.get_metrics(),
+                "prediction_cache": FossilAgeRegression(prediction_config).prediction_cache.get_stats()}
+
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
     app_run(app, host=APP_HOST, port=APP_PORT)
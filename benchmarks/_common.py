@@ -0,0 +1,103 @@
+"""
+Helpers shared by the benchmark scripts: timing, peak memory, the synthetic model set-up on the
+mongodb_data CSV files and the in-process S3 stand-in.
+
+The src modules are imported inside the functions, so that a benchmark only loads what it measures.
+Install the benchmark-only dependencies with `pip install -r requirements-bench.txt`.
+"""
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+TRAIN_FILE_PATH = os.path.join("mongodb_data", "train_data.csv")
+TEST_FILE_PATH = os.path.join("mongodb_data", "test_data.csv")
+
+
+def add_data_arguments(parser) -> None:
+    "The --train/--test CSV files of the benchmarks that fit a model."
+    parser.add_argument("--train", default=TRAIN_FILE_PATH)
+    parser.add_argument("--test", default=TEST_FILE_PATH)
+
+
+def latency(fn, repeat: int, inputs=None, percentile: float = 50.0) -> float:
+    """
+    Percentile (median by default) of the duration of fn() over repeat calls, in seconds.
+    inputs: optional sequence, call i is then fn(inputs[i % len(inputs)]).
+    """
+    timings = []
+    for index in range(repeat):
+        if inputs is None:
+            started = time.perf_counter()
+            fn()
+        else:
+            value = inputs[index % len(inputs)]
+            started = time.perf_counter()
+            fn(value)
+        timings.append(time.perf_counter() - started)
+    return float(np.percentile(timings, percentile))
+
+
+def measure_peak(fn):
+    "Wall time (s), tracemalloc peak (bytes, NumPy and Python allocations) and result of fn()."
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        result = fn()
+        duration = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return duration, peak, result
+
+
+def fit_preprocessor(train_df):
+    "The DataTransformation preprocessor fitted on the features of train_df, with the transformed features."
+    from src.constants import TARGET_COLUMN
+    from src.components.data_transformation import DataTransformation
+    preprocessor = DataTransformation(None, None, None).get_data_transformer_object()
+    return preprocessor, preprocessor.fit_transform(train_df.drop(columns=[TARGET_COLUMN]))
+
+
+def get_trainer(estimator: str):
+    "ModelTrainer configured for the estimator backend, for its base parameters and exports."
+    from src.components.model_trainer import ModelTrainer
+    from src.entity.config_entity import ModelTrainerConfig
+    config = ModelTrainerConfig()
+    config.estimator = estimator
+    return ModelTrainer(None, config)
+
+
+def fit_estimator(estimator: str, x_train: np.ndarray, y_train: np.ndarray):
+    "An estimator of the backend fitted with the ModelTrainerConfig parameters."
+    from src.components.estimator_backends import build_estimator
+    return build_estimator(estimator, get_trainer(estimator).get_base_params()).fit(x_train, y_train)
+
+
+def build_served_model(train_df):
+    "MyModel as the ModelTrainer pushes it: gradient boosting with the compiled model and preprocessor exports."
+    from src.constants import TARGET_COLUMN
+    from src.components.estimator_backends import GRADIENT_BOOSTING
+    from src.entity.estimator import MyModel
+    preprocessor, x_train = fit_preprocessor(train_df)
+    trainer = get_trainer(GRADIENT_BOOSTING)
+    model = fit_estimator(GRADIENT_BOOSTING, x_train, train_df[TARGET_COLUMN].to_numpy())
+    return MyModel(preprocessor, model, compiled_model_object=trainer.export_compiled_model(model, x_train[:100]),
+                   compiled_preprocessing_object=trainer.export_compiled_preprocessor(preprocessor))
+
+
+def setup_s3(use_moto: bool = True) -> None:
+    """
+    Dummy credentials (unless set) and, with use_moto, an in-process moto S3, started before
+    SimpleStorageService opens its client.
+    """
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    if use_moto:
+        from moto import mock_aws
+        mock_aws().start()
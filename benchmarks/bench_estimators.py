@@ -0,0 +1,47 @@
+"""
+Benchmark: ModelTrainer estimator backends (GradientBoostingRegressor vs HistGradientBoostingRegressor).
+
+Fits every backend with the ModelTrainerConfig parameters on mongodb_data/train_data.csv, transformed with
+the DataTransformation preprocessor, and reports the fit time, the single-row and batch predict latency and
+the R2 score on mongodb_data/test_data.csv.
+
+usage: python benchmarks/bench_estimators.py --repeat 200
+"""
+import os
+import time
+import argparse
+import pandas as pd
+from sklearn.metrics import r2_score
+
+from _common import add_data_arguments, latency, fit_preprocessor, get_trainer
+from src.constants import TARGET_COLUMN
+from src.components.estimator_backends import ESTIMATOR_BACKENDS, build_estimator, fitted_iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_data_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=200, help="predict calls per latency measurement")
+    args = parser.parse_args()
+
+    train_df = pd.read_csv(args.train)
+    test_df = pd.read_csv(args.test)
+    preprocessor, x_train = fit_preprocessor(train_df)
+    x_test = preprocessor.transform(test_df.drop(columns=[TARGET_COLUMN]))
+    y_train, y_test = train_df[TARGET_COLUMN].to_numpy(), test_df[TARGET_COLUMN].to_numpy()
+    print(f"train rows={len(x_train)}  test rows={len(x_test)}  cores={os.cpu_count()}")
+
+    for estimator in ESTIMATOR_BACKENDS:
+        model = build_estimator(estimator, get_trainer(estimator).get_base_params())
+        started = time.perf_counter()
+        model.fit(x_train, y_train)
+        fit_time = time.perf_counter() - started
+        score = r2_score(y_test, model.predict(x_test))
+        single = latency(lambda: model.predict(x_test[:1]), args.repeat) * 1e3
+        batch = latency(lambda: model.predict(x_test), max(1, args.repeat // 20)) * 1e3
+        print(f"{estimator:<24} iterations={fitted_iterations(model):>4}  fit={fit_time:7.3f}s  "
+              f"predict_1={single:7.3f}ms  predict_{len(x_test)}={batch:8.3f}ms  r2={score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: FetchData streaming export vs the previous pd.DataFrame(list(collection.find())) export.
+
+Runs against an in-process mongomock collection filled with copies of mongodb_data/train_data.csv, so no
+MongoDB server is needed (pip install -r requirements-bench.txt).
+
+usage: python benchmarks/bench_fetch_data.py --copies 20 --batch-size 10000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+import mongomock
+
+from _common import TRAIN_FILE_PATH, measure_peak
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.constants import DATABASE_NAME, COLLECTION_NAME
+
+
+def legacy_export(collection) -> pd.DataFrame:
+    "The export used before the streaming path."
+    df = pd.DataFrame(list(collection.find()))
+    if "_id" in df.columns.to_list():
+        df = df.drop(columns="_id")
+    df.replace({"na": np.nan}, inplace=True)
+    return df
+
+
+def measure(label, fn):
+    elapsed, peak, df = measure_peak(fn)
+    print(f"{label:<22} rows={len(df):>8}  time={elapsed:7.3f}s  peak_memory={peak / 1024 / 1024:8.1f} MiB")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=20, help="copies of train_data.csv inserted in the collection")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    ##in-process stand-in for the Atlas cluster, shared through the MongoDBClient class variable
+    MongoDBClient.client = mongomock.MongoClient()
+    collection = MongoDBClient.client[DATABASE_NAME][COLLECTION_NAME]
+    records = pd.read_csv(TRAIN_FILE_PATH).to_dict(orient="records")
+    for _ in range(args.copies):
+        collection.insert_many([dict(record) for record in records])
+    print(f"collection documents: {collection.count_documents({})}")
+
+    from src.data_access.fetch_data import FetchData
+    fetch_data = FetchData()
+    legacy = measure("legacy list(find())", lambda: legacy_export(collection))
+    streamed = measure("streaming export", lambda: fetch_data.export_collection_as_dataframe(
+        collection_name=COLLECTION_NAME, batch_size=args.batch_size))
+    pd.testing.assert_frame_equal(legacy.reset_index(drop=True), streamed[legacy.columns], check_dtype=False)
+    print("outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: cold-start import time of the serving app.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters and reports the cumulative import time of
+app and of the heaviest top-level packages; the timings depend on the machine and are only reported.
+
+The pass/fail check is the lazy-import invariant: after `import app` in a fresh interpreter, none of the
+modules only needed for training or for talking to MongoDB/S3 may be in sys.modules. Exits with status 1
+when one of them is, so it can gate a CI job (the repo has no test suite).
+
+usage: python benchmarks/bench_import_time.py --repeat 5
+"""
+import re
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+from collections import defaultdict
+
+from _common import ROOT_DIR
+
+##modules the serving process must not pay for at start-up, they are imported on first use
+LAZY_MODULES = ("sklearn", "scipy", "pymongo", "certifi", "boto3", "botocore", "mypy_boto3_s3", "dill",
+                "yaml", "src.pipline.training_pipeline", "src.components", "src.data_access",
+                "src.cloud_storage.aws_storage")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str) -> dict:
+    "Cumulative import time (microseconds) of every module imported by `import module` in a fresh interpreter."
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            profile[match.group(4)] = int(match.group(2))
+    return profile
+
+
+def eager_modules(module: str) -> list:
+    "The LAZY_MODULES (and their submodules) in sys.modules after `import module` in a fresh interpreter."
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return [name for name in loaded
+            if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="module imported by the serving process")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=10, help="number of top-level packages to report")
+    args = parser.parse_args()
+
+    totals = []
+    packages = defaultdict(list)
+    for _ in range(args.repeat):
+        profile = import_profile(args.module)
+        totals.append(profile[args.module] / 1000)
+        top_level = defaultdict(int)
+        for name, cumulative in profile.items():
+            if "." not in name:
+                top_level[name] += cumulative
+        for name, cumulative in top_level.items():
+            packages[name].append(cumulative / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"import {args.module}: median={median_ms:.1f}ms  min={min(totals):.1f}ms  max={max(totals):.1f}ms")
+    heaviest = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, timings in heaviest[:args.top]:
+        print(f"  {name:<28} {statistics.median(timings):9.1f}ms")
+
+    eager = eager_modules(args.module)
+    if eager:
+        print(f"FAIL: imported at start-up although only needed on first use: {', '.join(eager)}")
+        sys.exit(1)
+    print(f"OK: none of {', '.join(LAZY_MODULES)} imported by import {args.module}")
+
+
+if __name__ == "__main__":
+    main()
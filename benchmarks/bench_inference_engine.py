@@ -0,0 +1,47 @@
+"""
+Benchmark: compiled tree-ensemble inference vs GradientBoostingRegressor.predict.
+
+Fits the ModelTrainer's GradientBoostingRegressor on mongodb_data/train_data.csv, compiles it with
+CompiledTreeEnsemble.from_estimator and, on mongodb_data/test_data.csv, checks that both engines return the
+same predictions and compares their single-row and batch latency.
+
+usage: python benchmarks/bench_inference_engine.py --repeat 500
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+from _common import add_data_arguments, latency, fit_preprocessor, fit_estimator
+from src.constants import TARGET_COLUMN
+from src.components.estimator_backends import GRADIENT_BOOSTING
+from src.entity.compiled_model import CompiledTreeEnsemble
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_data_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=500, help="predict calls per latency measurement")
+    args = parser.parse_args()
+
+    train_df = pd.read_csv(args.train)
+    test_df = pd.read_csv(args.test)
+    preprocessor, x_train = fit_preprocessor(train_df)
+    x_test = preprocessor.transform(test_df.drop(columns=[TARGET_COLUMN]))
+    model = fit_estimator(GRADIENT_BOOSTING, x_train, train_df[TARGET_COLUMN].to_numpy())
+    compiled = CompiledTreeEnsemble.from_estimator(model)
+
+    expected, actual = model.predict(x_test), compiled.predict(x_test)
+    print(f"trees={len(compiled.roots)}  nodes={len(compiled.value)}  max_depth={compiled.max_depth}")
+    print(f"max abs difference={np.max(np.abs(expected - actual)):.3e}  "
+          f"identical={np.array_equal(expected, actual)}  allclose={np.allclose(expected, actual, rtol=1e-9, atol=1e-6)}")
+    for rows in (1, 64, len(x_test)):
+        x = x_test[:rows]
+        repeat = max(1, args.repeat * 64 // max(rows, 64))
+        sklearn_ms = latency(model.predict, repeat, inputs=[x]) * 1e3
+        compiled_ms = latency(compiled.predict, repeat, inputs=[x]) * 1e3
+        print(f"rows={rows:>5}  sklearn={sklearn_ms:8.3f}ms  compiled={compiled_ms:8.3f}ms  "
+              f"speedup={sklearn_ms / compiled_ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: serving the model from the local model store, fully offline.
+
+A model trained on mongodb_data/train_data.csv (with the ModelTrainer exports) is saved into a temporary
+local store through FossilEstimator.save_model, then the benchmark measures
+- the version check the ModelRegistry runs on every refresh (one stat call)
+- loading the model: plain read + pickle.loads vs the memory-mapped load of LocalStorageService
+- a cold FossilAgeRegression warm-up and single-record predictions with MODEL_STORAGE_BACKEND=local
+
+usage: python benchmarks/bench_model_storage.py --repeat 50
+"""
+import os
+import time
+import pickle
+import argparse
+import tempfile
+import pandas as pd
+
+from _common import add_data_arguments, latency, build_served_model
+from src.constants import TARGET_COLUMN
+from src.cloud_storage.storage_backend import LOCAL_STORAGE
+from src.entity.config_entity import FossilPredictionConfig
+from src.entity.s3_estimator import FossilEstimator
+from src.entity.model_registry import ModelRegistry
+from src.pipline.prediction_pipeline import FossilAgeRegression, FossilRecord
+from src.utils.main_utils import save_object
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_data_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=50, help="repetitions per measurement")
+    args = parser.parse_args()
+
+    my_model = build_served_model(pd.read_csv(args.train))
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        prediction_config = FossilPredictionConfig()
+        prediction_config.model_storage_backend = LOCAL_STORAGE
+        prediction_config.model_storage_dir = store_dir
+        estimator = FossilEstimator(bucket_name=prediction_config.model_bucket_name,
+                                    model_path=prediction_config.model_file_path,
+                                    storage_backend=LOCAL_STORAGE, storage_dir=store_dir)
+        model_file = os.path.join(store_dir, "model_to_push.pkl")
+        save_object(model_file, my_model)
+        estimator.save_model(from_file=model_file, remove=True)
+        stored_file = estimator.storage.get_file_path(estimator.bucket_name, estimator.model_path)
+        print(f"model file: {os.path.getsize(stored_file) / 1e6:.2f}MB")
+
+        def read_load():
+            with open(stored_file, "rb") as file_obj:
+                return pickle.loads(file_obj.read())
+
+        print(f"version check        {latency(estimator.get_model_version, args.repeat * 20) * 1e3:9.3f}ms")
+        print(f"load (read + loads)  {latency(read_load, args.repeat) * 1e3:9.3f}ms")
+        print(f"load (mmap)          {latency(estimator.load_model, args.repeat) * 1e3:9.3f}ms")
+
+        ModelRegistry.clear()
+        predictor = FossilAgeRegression(prediction_config)
+        started = time.perf_counter()
+        warmup = predictor.warm_up(prediction_config.warmup_batch_rows)
+        print(f"cold warm-up         {(time.perf_counter() - started) * 1e3:9.3f}ms  {warmup}")
+        forms = pd.read_csv(args.test).drop(columns=[TARGET_COLUMN]).head(200).to_dict(orient="records")
+        records = [FossilRecord.from_mapping(form) for form in forms]
+        ##every record once, so that the prediction cache never answers
+        predictor.prediction_cache.clear()
+        predict_ms = latency(lambda record: predictor.predict([record]), len(records), inputs=records) * 1e3
+        print(f"single prediction    {predict_ms:9.3f}ms")
+        ModelRegistry.clear()
+
+
+if __name__ == "__main__":
+    main()
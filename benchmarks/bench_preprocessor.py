@@ -0,0 +1,46 @@
+"""
+Benchmark: CompiledPreprocessor vs the fitted DataTransformation pipeline (ColumnTransformer).
+
+Fits the preprocessing pipeline on mongodb_data/train_data.csv, compiles it and, on mongodb_data/test_data.csv,
+checks that both produce the same array and compares a single record (DataFrame for the pipeline, dict for
+the compiled preprocessor) and the whole test set.
+
+usage: python benchmarks/bench_preprocessor.py --repeat 2000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+from _common import add_data_arguments, latency, fit_preprocessor
+from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml_file
+from src.entity.compiled_preprocessor import CompiledPreprocessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_data_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=2000, help="transform calls per latency measurement")
+    args = parser.parse_args()
+
+    pipeline, _ = fit_preprocessor(pd.read_csv(args.train))
+    test_df = pd.read_csv(args.test).drop(columns=[TARGET_COLUMN])
+    compiled = CompiledPreprocessor.from_pipeline(pipeline, read_yaml_file(SCHEMA_FILE_PATH))
+
+    expected = pipeline.transform(test_df)
+    records = test_df.to_dict(orient="records")
+    print(f"records allclose={np.allclose(compiled.transform(records), expected, rtol=1e-12, atol=1e-12)}  "
+          f"dataframe allclose={np.allclose(compiled.transform(test_df), expected, rtol=1e-12, atol=1e-12)}")
+
+    single_df, single_record = test_df.head(1), records[0]
+    pipeline_us = latency(pipeline.transform, args.repeat, inputs=[single_df]) * 1e6
+    compiled_us = latency(compiled.transform, args.repeat, inputs=[single_record]) * 1e6
+    print(f"1 record      pipeline={pipeline_us:9.1f}us  compiled={compiled_us:9.1f}us  speedup={pipeline_us / compiled_us:6.1f}x")
+    repeat = max(1, args.repeat // 100)
+    pipeline_us = latency(pipeline.transform, repeat, inputs=[test_df]) * 1e6
+    compiled_us = latency(compiled.transform, repeat, inputs=[test_df]) * 1e6
+    print(f"{len(test_df)} records pipeline={pipeline_us:9.1f}us  compiled={compiled_us:9.1f}us  speedup={pipeline_us / compiled_us:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
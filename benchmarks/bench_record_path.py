@@ -0,0 +1,61 @@
+"""
+Benchmark: per-request overhead of the single-record prediction path.
+
+before: form values -> FossilPrediction -> get_fossil_input_dataframe -> MyModel.transform_predict (sklearn)
+after:  form values -> FossilRecord -> MyModel.transform_predict([record]) with the compiled engine, which
+        writes the record into a preallocated NumPy row
+
+Both paths are measured with and without the model prediction, on a model trained on
+mongodb_data/train_data.csv with the ModelTrainer exports, for records of mongodb_data/test_data.csv.
+
+usage: python benchmarks/bench_record_path.py --repeat 2000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+from _common import add_data_arguments, latency, build_served_model
+from src.constants import TARGET_COLUMN
+from src.pipline.prediction_pipeline import FossilPrediction, FossilRecord
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_data_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=2000, help="requests per measurement")
+    args = parser.parse_args()
+
+    my_model = build_served_model(pd.read_csv(args.train))
+
+    forms = pd.read_csv(args.test).drop(columns=[TARGET_COLUMN]).head(200).to_dict(orient="records")
+
+    def before_input(form):
+        return FossilPrediction(**form).get_fossil_input_dataframe()
+
+    def after_input(form):
+        return [FossilRecord.from_mapping(form)]
+
+    def before_transform(form):
+        return my_model.get_preprocessor("sklearn").transform(before_input(form))
+
+    def after_transform(form):
+        return my_model.transform_records(after_input(form), engine="compiled")
+
+    def before_predict(form):
+        return my_model.transform_predict(before_input(form), engine="sklearn")
+
+    def after_predict(form):
+        return my_model.transform_predict(after_input(form), engine="compiled")
+
+    same = all(np.allclose(before_predict(form), after_predict(form)) for form in forms[:50])
+    print(f"same predictions={same}")
+    for label, before, after in (("input object", before_input, after_input),
+                                 ("input + preprocessing", before_transform, after_transform),
+                                 ("full prediction", before_predict, after_predict)):
+        before_us = latency(before, args.repeat, inputs=forms) * 1e6
+        after_us = latency(after, args.repeat, inputs=forms) * 1e6
+        print(f"{label:<22} before={before_us:9.1f}us  after={after_us:9.1f}us  speedup={before_us / after_us:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: reading a CSV object from S3 into pandas.
+
+before: get()["Body"].read().decode() wrapped in a StringIO, then pandas.read_csv (bytes, str and StringIO
+        copies of the object in memory before parsing)
+after:  SimpleStorageService.read_csv with the schema options (the body streamed into pandas.read_csv),
+        and SimpleStorageService.iter_csv_chunks (one chunk of rows at a time)
+
+The object is mongodb_data/test_data.csv repeated --copies times, uploaded to an in-process moto S3
+(pip install -r requirements-bench.txt). Peak memory is the tracemalloc peak during the read (NumPy and Python allocations).
+
+usage: python benchmarks/bench_s3_csv.py --copies 200 --chunksize 50000
+"""
+import io
+import os
+import argparse
+import pandas as pd
+
+from _common import TEST_FILE_PATH, measure_peak, setup_s3
+
+BUCKET_NAME = "fossil-csv-benchmark"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=TEST_FILE_PATH)
+    parser.add_argument("--copies", type=int, default=200, help="times the data file is repeated in the object")
+    parser.add_argument("--chunksize", type=int, default=50000, help="rows per chunk of iter_csv_chunks")
+    args = parser.parse_args()
+
+    setup_s3()
+    from src.cloud_storage.aws_storage import SimpleStorageService
+
+    storage = SimpleStorageService()
+    storage.s3_client.create_bucket(Bucket=BUCKET_NAME)
+    data = pd.read_csv(args.data)
+    body = pd.concat([data] * args.copies, ignore_index=True).to_csv(index=False).encode()
+    storage.s3_client.put_object(Bucket=BUCKET_NAME, Key="data.csv", Body=body)
+    print(f"object: {len(body) / 1e6:.1f}MB, {len(data) * args.copies} rows")
+    del body
+
+    def before():
+        content = storage.s3_client.get_object(Bucket=BUCKET_NAME, Key="data.csv")["Body"].read().decode()
+        return pd.read_csv(io.StringIO(content), na_values="na")
+
+    def after():
+        return storage.read_csv("data.csv", BUCKET_NAME, schema_file_path=os.path.join("config", "schema.yaml"))
+
+    def chunked():
+        ##aggregate chunk by chunk, as a job over an object larger than memory would
+        rows, age_sum = 0, 0.0
+        for chunk in storage.iter_csv_chunks("data.csv", BUCKET_NAME, chunksize=args.chunksize):
+            rows += len(chunk)
+            age_sum += chunk["age"].sum()
+        return rows
+
+    for label, fn in (("read + StringIO", before), ("streamed read_csv", after), ("iter_csv_chunks", chunked)):
+        duration, peak, result = measure_peak(fn)
+        peak /= 1e6
+        rows = result if isinstance(result, int) else len(result)
+        print(f"{label:<18} time={duration:7.3f}s  peak={peak:8.1f}MB  rows={rows}")
+
+
+if __name__ == "__main__":
+    main()
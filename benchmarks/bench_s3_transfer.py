@@ -0,0 +1,72 @@
+"""
+Benchmark: S3 uploads and downloads of SimpleStorageService against a local S3 stand-in.
+
+before: single-stream transfers (client.upload_file with a multipart threshold above the object size,
+        get()["Body"].read())
+after:  SimpleStorageService.upload_file / download_object with the S3TransferConfig settings: multipart upload
+        and parallel ranged GETs into one preallocated buffer, SHA-256 verified
+
+By default the S3 API is mocked in-process with moto, where there is no network latency to
+hide, so the numbers mostly show the overhead of the extra requests and of the checksum. Point
+AWS_ENDPOINT_URL at a moto server or MinIO (`--no-mock`) to include a real HTTP stack.
+Install moto with `pip install -r requirements-bench.txt`.
+
+usage: python benchmarks/bench_s3_transfer.py --sizes-mb 1 16 64 --chunk-mb 8 --concurrency 8
+"""
+import os
+import argparse
+import tempfile
+
+from _common import latency, setup_s3
+
+BUCKET_NAME = "fossil-transfer-benchmark"
+
+
+def timed(fn, repeat: int) -> float:
+    "Median duration of fn() in milliseconds."
+    return latency(fn, repeat) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 16, 64], help="object sizes to transfer")
+    parser.add_argument("--chunk-mb", type=float, default=8, help="multipart threshold and chunk size")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel parts per transfer")
+    parser.add_argument("--repeat", type=int, default=3, help="transfers per measurement")
+    parser.add_argument("--no-mock", action="store_true", help="use the endpoint of AWS_ENDPOINT_URL instead of moto")
+    args = parser.parse_args()
+
+    setup_s3(use_moto=not args.no_mock)
+
+    from boto3.s3.transfer import TransferConfig
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    from src.entity.config_entity import S3TransferConfig
+
+    chunk_size = int(args.chunk_mb * 1024 * 1024)
+    storage = SimpleStorageService(S3TransferConfig(multipart_threshold=chunk_size, multipart_chunksize=chunk_size,
+                                                    max_concurrency=args.concurrency, verify_checksum=True))
+    client = storage.s3_client
+    client.create_bucket(Bucket=BUCKET_NAME)
+    single_stream = TransferConfig(multipart_threshold=2 ** 62, use_threads=False)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size_mb in args.sizes_mb:
+            size = int(size_mb * 1024 * 1024)
+            file_path = os.path.join(work_dir, f"object_{size}.bin")
+            with open(file_path, "wb") as file_obj:
+                file_obj.write(os.urandom(size))
+            key = os.path.basename(file_path)
+
+            upload_before = timed(lambda: client.upload_file(file_path, BUCKET_NAME, key, Config=single_stream),
+                                  args.repeat)
+            upload_after = timed(lambda: storage.upload_file(file_path, key, BUCKET_NAME, remove=False), args.repeat)
+            download_before = timed(lambda: client.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read(), args.repeat)
+            download_after = timed(lambda: storage.download_object(BUCKET_NAME, key), args.repeat)
+            with open(file_path, "rb") as file_obj:
+                same = bytes(storage.download_object(BUCKET_NAME, key)) == file_obj.read()
+            print(f"{size_mb:7.1f}MB  upload before={upload_before:9.1f}ms after={upload_after:9.1f}ms   "
+                  f"download before={download_before:9.1f}ms after={download_after:9.1f}ms   same={same}")
+
+
+if __name__ == "__main__":
+    main()
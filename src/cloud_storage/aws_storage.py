@@ -1,31 +1,82 @@
 import os,sys
-import boto3
+import time
+import codecs
 import pickle
-from io import StringIO
-from typing import Union,List
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING,Dict,Iterator,Tuple,Union,Optional
 from src.exception import MyException
 from src.logger import logging
 from src.configuration.aws_connection import S3client
+from src.cloud_storage.storage_backend import ModelStorage
+from src.entity.config_entity import S3TransferConfig
+from src.constants import SCHEMA_FILE_PATH,S3_CSV_CHUNK_SIZE
+from src.utils.main_utils import read_yaml_file
 from pandas import DataFrame,read_csv
-from mypy_boto3_s3.service_resource import Bucket
-from botocore.exceptions import ClientError
+
+##boto3/botocore are imported on first use (S3client and the ClientError handlers), not when the module loads
+if TYPE_CHECKING:
+    from mypy_boto3_s3.service_resource import Bucket
+
+##object metadata key holding the SHA-256 of the uploaded file
+CHECKSUM_METADATA_KEY="sha256"
+READ_CHUNK_SIZE=1024*1024
+MISSING_KEY_ERROR_CODES=("404","NoSuchKey","NotFound")
+
+def get_csv_read_options(schema_file_path: str = SCHEMA_FILE_PATH) -> dict:
+    """
+    pandas.read_csv options of the schema: only the schema columns are parsed (the MongoDB _id and unknown
+    columns are skipped) and the numerical columns are read straight as float64, without type inference.
+    The categorical columns keep the inferred dtype, inclusion_of_other_fossils must stay boolean for the
+    fitted encoders.
+    """
+    schema_config = read_yaml_file(schema_file_path)
+    return {"usecols": list(schema_config["columns"]),
+            "dtype": {column: "float64" for column in schema_config["numerical_columns"]}}
+
+def file_sha256(file_path: str) -> str:
+    "SHA-256 hex digest of a local file, read in chunks."
+    digest=hashlib.sha256()
+    with open(file_path,"rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(READ_CHUNK_SIZE),b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 "AWS Simple Storage Service(S3): Set up the S3 bucket to store model and access it from anywhere."
 
-class SimpleStorageService:
+class SimpleStorageService(ModelStorage):
     """A class for interacting with AWS s3 bucket(storage), providing methods(way) for file mangement, 
     data uploads, and data retrieval from S3 bucket.
+
+    Key lookups are exact-key HEAD requests. Their result (ETag, LastModified, VersionId, size, or the key
+    being missing) is kept in a process-wide metadata cache for transfer_config.metadata_cache_ttl seconds,
+    then revalidated with a conditional GET (If-None-Match) that returns 304 while the object is unchanged.
     """
-    def __init__(self):
+    ##static variables shared across the process: (bucket_name, key) -> (expires_at, metadata or None if missing)
+    metadata_cache: Dict[Tuple[str, str], Tuple[float, Optional[dict]]] = {}
+    metadata_lock = threading.Lock()
+
+    def __init__(self, transfer_config: Optional[S3TransferConfig] = None):
         """
         Initialiazes the SimpleStorageServices(s3) instances with S3 resources and client from the S3Client
         class.
+        transfer_config: multipart threshold/chunk size, concurrency and checksum verification of the transfers.
         """
         s3_client=S3client()
         self.s3_resource=s3_client.s3_resource
         self.s3_client=s3_client.s3_client
+        self.transfer_config=transfer_config if transfer_config is not None else S3TransferConfig()
+
+    def get_boto3_transfer_config(self):
+        "boto3 TransferConfig of the managed uploads (multipart above the threshold, parts sent in parallel)."
+        from boto3.s3.transfer import TransferConfig
+        return TransferConfig(multipart_threshold=self.transfer_config.multipart_threshold,
+                              multipart_chunksize=self.transfer_config.multipart_chunksize,
+                              max_concurrency=self.transfer_config.max_concurrency,
+                              use_threads=self.transfer_config.max_concurrency>1)
 
-    def get_bucket(self, bucket_name:str) -> Bucket:
+    def get_bucket(self, bucket_name:str) -> "Bucket":
         """
         Fetch the s3 bucket object based on the provided bucket name. 
         """
@@ -49,54 +100,185 @@ class SimpleStorageService:
         """
         try:
             logging.info("Checking the presence of file in S3 bucket")
-            bucket=self.get_bucket(bucket_name)
-            file_object=[file for file in bucket.objects.filter(Prefix=s3_key)]
-            return len(file_object)>0
+            return self.get_object_metadata(bucket_name, s3_key) is not None
         except Exception as e:
             raise MyException(e,sys)
+
+    def key_exists(self, bucket_name: str, key: str) -> bool:
+        "ModelStorage interface: same as s3_key_path_checker."
+        return self.s3_key_path_checker(bucket_name=bucket_name, s3_key=key)
         
     @staticmethod
-    def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[StringIO, str]:
+    def metadata_from_response(response: dict) -> dict:
+        "ETag, LastModified, VersionId and size of a HEAD or (ranged) GET response."
+        content_range = response.get("ContentRange")
+        size = int(content_range.rsplit("/", 1)[1]) if content_range else response["ContentLength"]
+        return {"ETag": response["ETag"], "LastModified": response.get("LastModified"),
+                "VersionId": response.get("VersionId"), "ContentLength": size}
+
+    def cache_metadata(self, bucket_name: str, s3_key: str, metadata: Optional[dict]) -> None:
+        expires_at = time.monotonic() + self.transfer_config.metadata_cache_ttl
+        with SimpleStorageService.metadata_lock:
+            SimpleStorageService.metadata_cache[(bucket_name, s3_key)] = (expires_at, metadata)
+
+    def invalidate_metadata(self, bucket_name: str, s3_key: str) -> None:
+        with SimpleStorageService.metadata_lock:
+            SimpleStorageService.metadata_cache.pop((bucket_name, s3_key), None)
+
+    def fetch_metadata(self, bucket_name: str, s3_key: str, previous: Optional[dict]) -> dict:
+        """
+        One request for the current metadata of the key: a conditional GET of the first byte when the previous
+        ETag is known (304 Not Modified, and no body, while it is unchanged), a HEAD otherwise.
+        """
+        from botocore.exceptions import ClientError
+        if previous is None:
+            return self.metadata_from_response(self.s3_client.head_object(Bucket=bucket_name, Key=s3_key))
+        try:
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=s3_key, IfNoneMatch=previous["ETag"],
+                                                 Range="bytes=0-0")
+            ##release the pooled connection, the byte itself is never read
+            response["Body"].close()
+            return self.metadata_from_response(response)
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("304", "NotModified"):
+                return previous
+            if code == "InvalidRange":
+                ##an empty object has no first byte to fetch
+                return self.metadata_from_response(self.s3_client.head_object(Bucket=bucket_name, Key=s3_key))
+            raise
+
+    def get_object_metadata(self, bucket_name: str, s3_key: str) -> Optional[dict]:
+        """
+        ETag, LastModified, VersionId and size of the exact key, None if the object does not exist.
+        Served from the metadata cache within its TTL, revalidated with a single request afterwards.
+        """
+        from botocore.exceptions import ClientError
+        try:
+            entry = SimpleStorageService.metadata_cache.get((bucket_name, s3_key))
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            previous = None if entry is None else entry[1]
+            try:
+                metadata = self.fetch_metadata(bucket_name, s3_key, previous)
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in MISSING_KEY_ERROR_CODES:
+                    raise
+                metadata = None
+            self.cache_metadata(bucket_name, s3_key, metadata)
+            return metadata
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_object_version(self, bucket_name: str, s3_key: str) -> Optional[str]:
+        """
+        Returns the version of the specified S3 object (VersionId when bucket versioning is on, ETag otherwise),
+        or None if the object does not exist. Goes through the metadata cache: at most one request per TTL,
+        which is a 304 Not Modified as long as the object has not changed.
+        """
+        try:
+            metadata = self.get_object_metadata(bucket_name, s3_key)
+            if metadata is None:
+                return None
+            return metadata["VersionId"] or metadata["ETag"].strip('"')
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[codecs.StreamReader, str, bytes]:
         """
         Reads the specified S3 object with optional decoding and formatting.
+        make_readable: return a text stream decoding the body as it is read instead of the whole content,
+                       so the object is never held in memory twice (bytes and decoded copy).
         """
         # logging.info("Entered the read_object method of SimpleStorageService class")
         try:
+            body = object_name.get()["Body"]
+            # Stream the body through an incremental decoder if make_readable=True
+            if make_readable:
+                return codecs.getreader("utf-8")(body)
             # Read and decode the object content if decode=True
-            func = (
-                lambda: object_name.get()["Body"].read().decode()
-                if decode else object_name.get()["Body"].read()
-            )
-            # Convert to StringIO if make_readable=True
-            conv_func = lambda: StringIO(func()) if make_readable else func()
             # logging.info("Exited the read_object method of SimpleStorageService class")
-            return conv_func()
+            return body.read().decode() if decode else body.read()
         except Exception as e:
             raise MyException(e, sys)
     
-    def get_file_object(self, filename: str, bucket_name: str) -> Union[List[object], object]:
+    def get_file_object(self, filename: str, bucket_name: str) -> object:
         """
-        Retrieves the file object(s) from the specified bucket based on the filename.
+        Retrieves the file object of the exact key from the specified bucket (keys that merely start with the
+        filename, e.g. model.pkl.bak, are not matched).
         """
         logging.info("Entered the get_file_object method of SimpleStorageService class")
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=filename)]
-            func = lambda x: x[0] if len(x) == 1 else x
-            file_objs = func(file_objects)
+            if not self.s3_key_path_checker(bucket_name, filename):
+                raise FileNotFoundError(f"s3://{bucket_name}/{filename} does not exist")
+            file_obj = self.s3_resource.Object(bucket_name, filename)
             logging.info("Exited the get_file_object method of SimpleStorageService class")
-            return file_objs
+            return file_obj
         except Exception as e:
             raise MyException(e, sys)
         
+    @staticmethod
+    def read_body_into(body, target: memoryview) -> None:
+        "Copies a streaming response body into the target buffer chunk by chunk."
+        offset = 0
+        for chunk in body.iter_chunks(chunk_size=READ_CHUNK_SIZE):
+            target[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+        if offset != len(target):
+            raise IOError(f"Incomplete S3 read: got {offset} of {len(target)} bytes")
+
+    def download_object(self, bucket_name: str, s3_key: str) -> bytearray:
+        """
+        Downloads an object into a single preallocated buffer. Objects above the multipart threshold are fetched
+        with parallel ranged GETs of multipart_chunksize bytes, each written straight into its slice of the
+        buffer. Every GET is conditional on the ETag seen by the initial HEAD, so the parts of an object
+        overwritten in the meantime are never mixed. The SHA-256 stored at upload is verified when present.
+        """
+        try:
+            head = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+            self.cache_metadata(bucket_name, s3_key, self.metadata_from_response(head))
+            size, etag = head["ContentLength"], head["ETag"]
+            buffer = bytearray(size)
+            view = memoryview(buffer)
+            config = self.transfer_config
+            if size > config.multipart_threshold:
+                ranges = [(start, min(start + config.multipart_chunksize, size))
+                          for start in range(0, size, config.multipart_chunksize)]
+            else:
+                ranges = [(0, size)] if size else []
+
+            def fetch(byte_range):
+                start, stop = byte_range
+                extra = {"Range": f"bytes={start}-{stop - 1}"} if len(ranges) > 1 else {}
+                response = self.s3_client.get_object(Bucket=bucket_name, Key=s3_key, IfMatch=etag, **extra)
+                self.read_body_into(response["Body"], view[start:stop])
+
+            if len(ranges) > 1 and config.max_concurrency > 1:
+                with ThreadPoolExecutor(max_workers=min(config.max_concurrency, len(ranges)),
+                                        thread_name_prefix="s3-download") as executor:
+                    list(executor.map(fetch, ranges))
+            else:
+                for byte_range in ranges:
+                    fetch(byte_range)
+
+            expected = head.get("Metadata", {}).get(CHECKSUM_METADATA_KEY)
+            if config.verify_checksum and expected is not None:
+                actual = hashlib.sha256(view).hexdigest()
+                if actual != expected:
+                    raise IOError(f"Checksum mismatch for s3://{bucket_name}/{s3_key}: expected {expected}, got {actual}")
+            logging.info(f"Downloaded s3://{bucket_name}/{s3_key} ({size} bytes in {len(ranges)} part(s))")
+            return buffer
+        except Exception as e:
+            raise MyException(e, sys)
+
     def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
         """
         Loads a serialized model from the specified S3 bucket.
         """
         try:
             model_file = model_dir + "/" + model_name if model_dir else model_name
-            file_object = self.get_file_object(model_file, bucket_name)
-            model_obj = self.read_object(file_object, decode=False)
+            model_obj = self.download_object(bucket_name, model_file)
             model = pickle.loads(model_obj)
             logging.info("Production model loaded from S3 bucket.")
             return model
@@ -108,6 +290,7 @@ class SimpleStorageService:
         Creates a folder in the specified S3 bucket.
         """
         logging.info("Entered the create_folder method of SimpleStorageService class")
+        from botocore.exceptions import ClientError
         try:
             # Check if folder exists by attempting to load it
             self.s3_resource.Object(bucket_name, folder_name).load()
@@ -121,11 +304,21 @@ class SimpleStorageService:
     def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
         """
         Uploads a local file to the specified S3 bucket with an optional file deletion.
+        Files above the multipart threshold are uploaded in parts sent in parallel, and the SHA-256 of the file
+        is stored in the object metadata so that downloads can be verified.
         """
         logging.info("Entered the upload_file method of SimpleStorageService class")
         try:
             logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name}")
-            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename)
+            extra_args = {"Metadata": {CHECKSUM_METADATA_KEY: file_sha256(from_filename)}} \
+                if self.transfer_config.verify_checksum else None
+            self.s3_client.upload_file(from_filename, bucket_name, to_filename, ExtraArgs=extra_args,
+                                       Config=self.get_boto3_transfer_config())
+            if self.transfer_config.verify_checksum:
+                uploaded_size = self.s3_client.head_object(Bucket=bucket_name, Key=to_filename)["ContentLength"]
+                if uploaded_size != os.path.getsize(from_filename):
+                    raise IOError(f"Upload of {from_filename} is incomplete: {uploaded_size} bytes stored")
+            self.invalidate_metadata(bucket_name, to_filename)
             logging.info(f"Uploaded {from_filename} to {to_filename} in {bucket_name}")
             
             # Delete the local file if remove is True
@@ -149,28 +342,58 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys)
         
-    def get_df_from_object(self, object_: object) -> DataFrame:
+    def get_df_from_object(self, object_: object, **read_options) -> DataFrame:
         """
-        Converts an S3 object to a DataFrame.
+        Converts an S3 object to a DataFrame. The response body is streamed into the CSV parser, the object
+        is never held in memory as bytes or text.
+        read_options: extra pandas.read_csv options (e.g. usecols, dtype).
         """
         logging.info("Entered the get_df_from_object method of SimpleStorageService class")
         try:
-            content = self.read_object(object_, make_readable=True)
-            df = read_csv(content, na_values="na")
+            body = object_.get()["Body"]
+            try:
+                df = read_csv(body, na_values="na", **read_options)
+            finally:
+                body.close()
             logging.info("Exited the get_df_from_object method of SimpleStorageService class")
             return df
         except Exception as e:
             raise MyException(e, sys)
     
-    def read_csv(self, filename: str, bucket_name: str) -> DataFrame:
+    def read_csv(self, filename: str, bucket_name: str, schema_file_path: Optional[str] = None) -> DataFrame:
         """
         Reads a CSV file from the specified S3 bucket and converts it to a DataFrame.
+        schema_file_path: parse only the schema columns, with the schema dtypes (see get_csv_read_options).
         """
         logging.info("Entered the read_csv method of SimpleStorageService class")
         try:
             csv_obj = self.get_file_object(filename, bucket_name)
-            df = self.get_df_from_object(csv_obj)
+            read_options = get_csv_read_options(schema_file_path) if schema_file_path else {}
+            df = self.get_df_from_object(csv_obj, **read_options)
             logging.info("Exited the read_csv method of SimpleStorageService class")
             return df
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def iter_csv_chunks(self, filename: str, bucket_name: str, chunksize: int = S3_CSV_CHUNK_SIZE,
+                        schema_file_path: Optional[str] = SCHEMA_FILE_PATH, **read_options) -> Iterator[DataFrame]:
+        """
+        Streams a CSV file of the specified S3 bucket as DataFrames of at most chunksize rows, so objects larger
+        than memory can be processed: only the current chunk and the parser buffer are held at any time.
+        schema_file_path: parse only the schema columns, with the schema dtypes (None to infer every column).
+        read_options: extra pandas.read_csv options, overriding the schema ones.
+        """
+        logging.info(f"Streaming s3://{bucket_name}/{filename} in chunks of {chunksize} rows")
+        try:
+            csv_obj = self.get_file_object(filename, bucket_name)
+            options = get_csv_read_options(schema_file_path) if schema_file_path else {}
+            options.update(read_options)
+            body = csv_obj.get()["Body"]
+            try:
+                with read_csv(body, na_values="na", chunksize=chunksize, **options) as reader:
+                    for chunk in reader:
+                        yield chunk
+            finally:
+                body.close()
         except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
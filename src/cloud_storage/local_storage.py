@@ -0,0 +1,96 @@
+import os,sys
+import mmap
+import pickle
+import shutil
+import tempfile
+from typing import Optional
+from src.exception import MyException
+from src.logger import logging
+from src.cloud_storage.storage_backend import ModelStorage
+
+"Local filesystem model store: serve models from a mounted volume or a node-local cache, without any network call."
+
+class LocalStorageService(ModelStorage):
+    """
+    Model store backed by a local directory laid out like the S3 bucket: <root_dir>/<bucket_name>/<key>.
+
+    The version of an object is its modification time and size (one stat call), and models are unpickled
+    straight from a read-only memory map of the file, so no intermediate copy of the file is read into
+    memory and the pages are shared through the OS page cache by every worker loading the same model.
+    """
+    def __init__(self, root_dir: str):
+        """
+        root_dir: Directory holding one sub-directory per bucket.
+        """
+        if not root_dir:
+            raise ValueError("The local model storage backend needs a root directory (MODEL_STORAGE_DIR)")
+        self.root_dir = root_dir
+
+    def get_file_path(self, bucket_name: str, key: str) -> str:
+        "Path of the file stored under the key, keys cannot escape the bucket directory."
+        bucket_dir = os.path.abspath(os.path.join(self.root_dir, bucket_name))
+        file_path = os.path.abspath(os.path.join(bucket_dir, key))
+        if os.path.commonpath([bucket_dir, file_path]) != bucket_dir:
+            raise ValueError(f"Key {key} is outside of the bucket directory {bucket_dir}")
+        return file_path
+
+    def key_exists(self, bucket_name: str, key: str) -> bool:
+        try:
+            return os.path.isfile(self.get_file_path(bucket_name, key))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_object_version(self, bucket_name: str, s3_key: str) -> Optional[str]:
+        """
+        Returns the version of the stored file (modification time in ns and size), or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.get_file_path(bucket_name, s3_key))
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
+        """
+        Loads a serialized model from the local store through a read-only memory map of the file.
+        """
+        try:
+            model_file = model_dir + "/" + model_name if model_dir else model_name
+            file_path = self.get_file_path(bucket_name, model_file)
+            with open(file_path, "rb") as file_obj:
+                with mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as model_map:
+                    model = pickle.loads(model_map)
+            logging.info(f"Production model loaded from local store {file_path}.")
+            return model
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True) -> None:
+        """
+        Copies a local file into the store. The file is written next to its destination and renamed into
+        place, so a model being loaded concurrently is never read half written.
+        """
+        logging.info("Entered the upload_file method of LocalStorageService class")
+        try:
+            file_path = self.get_file_path(bucket_name, to_filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, "wb") as temp_file, open(from_filename, "rb") as source_file:
+                    shutil.copyfileobj(source_file, temp_file)
+                os.replace(temp_path, file_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            logging.info(f"Stored {from_filename} as {file_path}")
+
+            # Delete the local file if remove is True
+            if remove:
+                os.remove(from_filename)
+                logging.info(f"Removed local file {from_filename} after upload")
+            logging.info("Exited the upload_file method of LocalStorageService class")
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+
+"Model storage backends FossilEstimator loads and saves models with, selected by FossilPredictionConfig.model_storage_backend."
+
+S3_STORAGE = "s3"
+LOCAL_STORAGE = "local"
+
+STORAGE_BACKENDS = (S3_STORAGE, LOCAL_STORAGE)
+
+
+class ModelStorage(ABC):
+    """
+    Interface of a model store: objects addressed by a bucket name and a key, with a cheap version lookup
+    so that the ModelRegistry can detect a new model without downloading it.
+
+    Implementations: SimpleStorageService (AWS S3) and LocalStorageService (a directory on a local volume).
+    """
+    @abstractmethod
+    def key_exists(self, bucket_name: str, key: str) -> bool:
+        "True if an object is stored under the key."
+
+    @abstractmethod
+    def get_object_version(self, bucket_name: str, s3_key: str):
+        "Version of the object stored under the key, None if it does not exist."
+
+    @abstractmethod
+    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
+        "Unpickled model stored under model_dir/model_name."
+
+    @abstractmethod
+    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True) -> None:
+        "Stores a local file under the key to_filename, deleting the local file if remove is set."
+
+
+def build_storage_backend(storage_backend: str, root_dir: str = None) -> ModelStorage:
+    """
+    Returns the model store of the given backend. The backend modules are imported here so that boto3 is
+    only loaded when S3 is actually used.
+    root_dir: directory holding one sub-directory per bucket (local backend only).
+    """
+    if storage_backend == S3_STORAGE:
+        from src.cloud_storage.aws_storage import SimpleStorageService
+        return SimpleStorageService()
+    if storage_backend == LOCAL_STORAGE:
+        from src.cloud_storage.local_storage import LocalStorageService
+        return LocalStorageService(root_dir)
+    raise ValueError(f"Unknown model storage backend: {storage_backend}, expected one of {list(STORAGE_BACKENDS)}")
@@ -1,19 +1,26 @@
 import os
 import sys
+from functools import partial
 from src.exception import MyException
 from src.logger import logging
 
 from pandas import DataFrame
-from sklearn.model_selection import train_test_split
+from pandas.util import hash_pandas_object
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.data_access.fetch_data import FetchData
+from src.data_access.feature_store import FeatureStore
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml_file,save_dataframe
+from src.entity.artifact_store import artifact_store
+from src.pipline.stage_cache import hash_dataframe,config_values,source_files
 
 class DataIngestion:
     """Initialize the Data Ingestion Configuration to Ingest the data"""
-    def __init__(self, data_ingestion_config: DataIngestionConfig=DataIngestionConfig()):
+    def __init__(self, data_ingestion_config: DataIngestionConfig=DataIngestionConfig(),file_path=SCHEMA_FILE_PATH):
         try:
             self.data_ingestion_config=data_ingestion_config
+            self.schema_config=read_yaml_file(file_path)
         except Exception as e:
             raise MyException(e,sys)
     
@@ -22,15 +29,22 @@ class DataIngestion:
         try:
             logging.info("Starting Exporting data from mongodb")
             data=FetchData()
+            if self.data_ingestion_config.incremental:
+                ##only documents past the last high-water mark are fetched, then merged into the persistent store
+                feature_store=FeatureStore(store_dir=self.data_ingestion_config.persistent_feature_store_dir,
+                                           watermark_field=self.data_ingestion_config.watermark_field)
+                df=feature_store.sync(data,collection_name=self.data_ingestion_config.collection_name)
+                logging.info(f"Shape of the data {df.shape}")
+                logging.info(f"Feature store data kept at {feature_store.data_file_path}")
+                return df
             df=data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name)
             logging.info(f"Shape of the data {df.shape}")
             ##put these freshly imported data into feature_store_file_path folder
             logging.info("Storing imported data into feature_store_file_path folder")
             feature_store_file_path=self.data_ingestion_config.feature_store_file_path
-            dir_path=os.path.dirname(feature_store_file_path) ##directory name
-            os.makedirs(dir_path, exist_ok=True) ## make directory from above mentioned path
             logging.info(f"Saving exported data into feature store file path folder")
-            df.to_csv(feature_store_file_path, index=False, header=True)
+            artifact_store.put(feature_store_file_path, df,
+                               writer=partial(save_dataframe, categorical_columns=self.schema_config['categorical_columns']))
             return df
         
         except Exception as e:
@@ -39,29 +53,43 @@ class DataIngestion:
     """Split data into train and test data"""
     def train_test_split(self, data: DataFrame)->None:
         try:
-            train_set,test_set=train_test_split(data, test_size=self.data_ingestion_config.train_test_split_size)
-            dir_path=os.path.dirname(self.data_ingestion_config.training_file_path) ##
-            os.makedirs(dir_path,exist_ok=True)
+            ##deterministic split on a hash of the row values: a row keeps its side across training runs, so the
+            ##test set never holds rows the previous (champion) model was trained on
+            row_hashes=hash_pandas_object(data,index=False).to_numpy()
+            is_test=(row_hashes%1_000_000)<self.data_ingestion_config.train_test_split_size*1_000_000
+            train_set,test_set=data[~is_test],data[is_test]
+            logging.info(f"Split {len(data)} rows into {len(train_set)} train and {len(test_set)} test rows")
 
-            logging.info(f" Store train and test data into training folder")
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index=False, header=True)
-            test_set.to_csv(self.data_ingestion_config.test_file_path, index=False, header=True)
+            logging.info(f" Store train and test data into training folder as {self.data_ingestion_config.artifact_format}")
+            ##the splits are handed to the next stages in memory and written in the background
+            writer=partial(save_dataframe, categorical_columns=self.schema_config['categorical_columns'])
+            artifact_store.put(self.data_ingestion_config.training_file_path, train_set, writer=writer)
+            artifact_store.put(self.data_ingestion_config.test_file_path, test_set, writer=writer)
             logging.info(f"Data exported completed")
         except Exception as e:
             raise MyException(e,sys)
 
     """Initiate the data ingestion"""
-    def initiate_data_ingested(self)->DataIngestionArtifact:
+    def initiate_data_ingested(self,stage_cache=None)->DataIngestionArtifact:
         """
         Method: Data ingestion started.
         Basically, this method initiates the data ingestion method that perform 3 steps in pipeline for exporting data as follows:
             1. Export Data from mongodb
             2. Train Test Split
             3. Initiate data ingestion 
+        stage_cache: optional StageCache, when the exported data and the ingestion config are unchanged the
+                     train/test split of the previous run is reused.
         """
         try:
             ##export data
             data=self.export_data()
+            if stage_cache is not None:
+                stage_cache.fingerprint("data_ingestion",data=hash_dataframe(data),
+                                        config=config_values(self.data_ingestion_config),
+                                        code=source_files(DataIngestion))
+                cached_artifact=stage_cache.lookup("data_ingestion",DataIngestionArtifact)
+                if cached_artifact is not None:
+                    return cached_artifact
             ##split data into train test set
             self.train_test_split(data)
             ##initiate the data ingestion
@@ -10,7 +10,8 @@ from sklearn.compose import ColumnTransformer
 from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH
 from src.entity.config_entity import DataTransformationConfig
 from src.entity.artifact_entity import DataTransformationArtifact,DataValidationArtifact,DataIngestionArtifact
-from src.utils.main_utils import save_object,save_numpy_array_data,read_yaml_file
+from src.utils.main_utils import save_object,save_numpy_array_data,read_yaml_file,read_dataframe
+from src.entity.artifact_store import artifact_store
 
 ##data transformation class 
 class DataTransformation:
@@ -28,7 +29,7 @@ class DataTransformation:
     @staticmethod   
     def read_data(file_path)->pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return artifact_store.get(file_path, reader=read_dataframe)
         except Exception as e:
             raise MyException(e,sys)
         
@@ -121,9 +122,9 @@ class DataTransformation:
 
             "Save objects of transformation."
             logging.info("Saving preprocessing transformation model as object inside the t.")
-            save_object(self.data_transformation_config.transformed_object_file_path,preprocess)
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path,array=train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path,array=test_arr)
+            artifact_store.put(self.data_transformation_config.transformed_object_file_path,preprocess,writer=save_object)
+            artifact_store.put(self.data_transformation_config.transformed_train_file_path,train_arr,writer=save_numpy_array_data)
+            artifact_store.put(self.data_transformation_config.transformed_test_file_path,test_arr,writer=save_numpy_array_data)
             logging.info("Saving transformed file and object is successfully completed.")
             return DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
@@ -5,7 +5,8 @@ import pandas as pd
 from pandas import DataFrame
 from src.logger import logging
 from src.exception import MyException
-from src.utils.main_utils import read_yaml_file
+from src.utils.main_utils import read_yaml_file,read_dataframe
+from src.entity.artifact_store import artifact_store
 from src.entity.config_entity import DataValidationConfig
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.constants import SCHEMA_FILE_PATH
@@ -56,7 +57,7 @@ class DataValidation:
     @staticmethod
     def read_data(file)->DataFrame:
         try:
-            return pd.read_csv(file)
+            return artifact_store.get(file, reader=read_dataframe)
         except Exception as e:
             raise MyException(e,sys)
         
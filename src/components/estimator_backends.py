@@ -0,0 +1,23 @@
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+"Estimators the ModelTrainer can train, selected by ModelTrainerConfig.estimator (MODEL_TRAINER_ESTIMATOR)."
+
+GRADIENT_BOOSTING = "gradient_boosting"
+HIST_GRADIENT_BOOSTING = "hist_gradient_boosting"
+
+ESTIMATOR_BACKENDS = {
+    GRADIENT_BOOSTING: GradientBoostingRegressor,
+    HIST_GRADIENT_BOOSTING: HistGradientBoostingRegressor,
+}
+
+def build_estimator(estimator: str, params: dict) -> object:
+    "Returns an unfitted estimator of the given backend."
+    if estimator not in ESTIMATOR_BACKENDS:
+        raise ValueError(f"Unknown estimator backend: {estimator}, expected one of {list(ESTIMATOR_BACKENDS)}")
+    return ESTIMATOR_BACKENDS[estimator](**params)
+
+def fitted_iterations(model: object) -> int:
+    "Number of boosting iterations actually fitted, below the configured maximum when early stopping kicked in."
+    if isinstance(model, HistGradientBoostingRegressor):
+        return int(model.n_iter_)
+    return int(model.n_estimators_)
@@ -1,14 +1,20 @@
 import sys
+import time
+import numpy as np
 import pandas as pd
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict,Optional,Tuple
 from src.exception import MyException
 from src.logger import logging
 from src.constants import TARGET_COLUMN
 from src.entity.config_entity import ModelEvaluationConfig
 from src.entity.artifact_entity import ModelTrainerArtifact,DataIngestionArtifact,ModelEvaluationArtifact,ModelEvaluationResponse
-from src.utils.main_utils import load_object
+from src.utils.main_utils import load_object,read_dataframe,write_yaml_file
+from src.utils.evaluation_utils import regression_metrics,bootstrap_metric_samples,confidence_interval,segment_metrics
+from src.entity.artifact_store import artifact_store
 from sklearn.metrics import r2_score,mean_squared_error
 from src.entity.s3_estimator import FossilEstimator
+from src.entity.estimator import MyModel
 from dataclasses import dataclass
     
 class ModelEvaluation:
@@ -27,32 +33,126 @@ class ModelEvaluation:
             bucket_name = self.model_eval_config.bucket_name
             model_path=self.model_eval_config.s3_model_key_path
             fossil_estimator=FossilEstimator(bucket_name=bucket_name,
-                                             model_path=model_path)
+                                             model_path=model_path,
+                                             storage_backend=self.model_eval_config.model_storage_backend,
+                                             storage_dir=self.model_eval_config.model_storage_dir)
             if fossil_estimator.is_model_present(model_path=model_path):
                 return fossil_estimator
             return None
         except Exception as e:
             raise MyException(e,sys)
         
+    def fetch_best_model(self)->Tuple[Optional[MyModel],float]:
+        "Downloads the production model (None if there is none yet), returns it with the fetch wall time."
+        started=time.perf_counter()
+        best_model=self.get_best_model()
+        model=None if best_model is None else best_model.load_model()
+        return model,time.perf_counter()-started
+
+    @staticmethod
+    def predict(model:MyModel,x:pd.DataFrame,transformed:Dict[int,np.ndarray])->np.ndarray:
+        """
+        Predictions of a model on the test features. The transformed test matrix is cached in `transformed`
+        by preprocessor identity, so models sharing the same fitted preprocessor object transform the data once
+        (the models must stay alive while `transformed` is in use, ids are only unique among live objects).
+        """
+        preprocessor=model.get_preprocessor("sklearn")
+        key=id(preprocessor)
+        if key not in transformed:
+            transformed[key]=preprocessor.transform(x)
+        return model.get_predictor("sklearn").predict(transformed[key])
+
+    def get_evaluation_report(self,x:pd.DataFrame,y:np.ndarray,y_preds:Dict[str,np.ndarray],
+                              step_durations:Dict[str,float])->dict:
+        """
+        Bootstrap confidence intervals of R²/MSE for each model (paired resamples of the test set) and of the
+        trained minus production difference, plus the metrics per segment of the configured columns.
+        y_preds: "trained_model" and, when there is one, "best_model" predictions on the test set.
+        """
+        config=self.model_eval_config
+        started=time.perf_counter()
+        samples=bootstrap_metric_samples(y,y_preds,n_resamples=config.bootstrap_resamples,
+                                         random_state=config.random_state,chunk_cells=config.bootstrap_chunk_cells)
+        report={"n_test_samples":len(y),"n_resamples":config.bootstrap_resamples,
+                "confidence_level":config.confidence_level}
+        for name,y_pred in y_preds.items():
+            report[name]={**regression_metrics(y,y_pred),
+                          "r2_interval":confidence_interval(samples[name]["r2"],config.confidence_level),
+                          "mse_interval":confidence_interval(samples[name]["mse"],config.confidence_level)}
+        if "best_model" in y_preds:
+            report["difference"]={metric:confidence_interval(samples["trained_model"][metric]-samples["best_model"][metric],
+                                                             config.confidence_level)
+                                  for metric in ("r2","mse")}
+        step_durations["bootstrap"]=time.perf_counter()-started
+
+        started=time.perf_counter()
+        segments={column:x[column].to_numpy() for column in config.segment_columns if column in x.columns}
+        for name,y_pred in y_preds.items():
+            report[name]["segments"]=segment_metrics(y,y_pred,segments)
+        step_durations["segments"]=time.perf_counter()-started
+        return report
+
     def evaluate_model(self)->ModelEvaluationResponse:
+        """
+        Scores the trained (challenger) and the production (champion) model on the same in-memory test set.
+        The champion is downloaded in a background thread while the challenger is being scored.
+        The trained model is accepted when the lower bound of the confidence interval of its R² improvement
+        over the production model (over 0 when there is no production model yet) exceeds changed_threshold_score.
+        """
         try:
-            test_df=pd.read_csv(self.data_ingestion_artifact.test_file_path)
-            x,y=test_df.drop(columns=[TARGET_COLUMN],axis=1),test_df[TARGET_COLUMN]
-            
-            trained_model= load_object(file_path=self.model_trainer_artifact.trained_model_file)
-            trained_model_r2_square=self.model_trainer_artifact.metric_artifact.r2_squared
-            logging.info(f"R2 Squared score: {trained_model_r2_square}")
+            step_durations={}
+            evaluation_started=time.perf_counter()
+            with ThreadPoolExecutor(max_workers=1,thread_name_prefix="champion-fetch") as executor:
+                best_model_future=executor.submit(self.fetch_best_model)
+
+                started=time.perf_counter()
+                test_df=artifact_store.get(self.data_ingestion_artifact.test_file_path,reader=read_dataframe)
+                x,y=test_df.drop(columns=[TARGET_COLUMN],axis=1),test_df[TARGET_COLUMN].to_numpy()
+                step_durations["load_test_data"]=time.perf_counter()-started
+
+                started=time.perf_counter()
+                trained_model= artifact_store.get(self.model_trainer_artifact.trained_model_file,reader=load_object)
+                step_durations["load_trained_model"]=time.perf_counter()-started
+
+                started=time.perf_counter()
+                transformed={}
+                y_preds={"trained_model":self.predict(trained_model,x,transformed)}
+                trained_model_r2_square=r2_score(y,y_preds["trained_model"])
+                step_durations["score_trained_model"]=time.perf_counter()-started
+                logging.info(f"R2 Squared score: {trained_model_r2_square} "
+                             f"(model trainer reported {self.model_trainer_artifact.metric_artifact.r2_squared})")
+
+                started=time.perf_counter()
+                best_model,step_durations["fetch_best_model"]=best_model_future.result()
+                step_durations["wait_best_model"]=time.perf_counter()-started
+
             best_model_r2_square=None
-            best_model=self.get_best_model()
             if best_model is not None:
-                y_pred_best_model=best_model.predict(x)
-                best_model_score=r2_score(y_pred_best_model,y)
+                started=time.perf_counter()
+                y_preds["best_model"]=self.predict(best_model,x,transformed)
+                best_model_r2_square=r2_score(y,y_preds["best_model"])
+                step_durations["score_best_model"]=time.perf_counter()-started
+                logging.info(f"Production model R2 Squared score: {best_model_r2_square}")
+
+            ##one prediction vector per model, every resample and segment is computed from it
+            evaluation_report=self.get_evaluation_report(x,y,y_preds,step_durations)
+            if best_model is None:
+                r2_improvement_lower=evaluation_report["trained_model"]["r2_interval"]["lower"]
+            else:
+                r2_improvement_lower=evaluation_report["difference"]["r2"]["lower"]
+            logging.info(f"R2 improvement lower bound ({self.model_eval_config.confidence_level:.0%} confidence): "
+                         f"{r2_improvement_lower}")
+            step_durations["total"]=time.perf_counter()-evaluation_started
+            step_durations={step:round(duration,4) for step,duration in step_durations.items()}
+            logging.info(f"Model evaluation step durations (s): {step_durations}")
 
             temp_best_model_score=0 if best_model_r2_square is None else best_model_r2_square
             result=ModelEvaluationResponse(trained_model_r2_squared=trained_model_r2_square,
                                            best_model_r2_squared_score=best_model_r2_square,
-                                           is_model_accepted=trained_model_r2_square>temp_best_model_score,
-                                           difference=trained_model_r2_square-temp_best_model_score)
+                                           is_model_accepted=r2_improvement_lower>self.model_eval_config.changed_threshold_score,
+                                           difference=trained_model_r2_square-temp_best_model_score,
+                                           step_durations=step_durations,
+                                           evaluation_report=evaluation_report)
             return result
         except Exception as e:
             raise MyException(e,sys)
@@ -62,12 +162,15 @@ class ModelEvaluation:
             logging.info("Initialized Model Evaluation Component.")
             evaluate_model_response = self.evaluate_model()
             s3_model_path = self.model_eval_config.s3_model_key_path
+            write_yaml_file(self.model_eval_config.evaluation_report_file_path,evaluate_model_response.evaluation_report)
 
             model_evaluation_artifact = ModelEvaluationArtifact(
             is_model_accepted=evaluate_model_response.is_model_accepted,
             s3_model_path=s3_model_path,
             trained_model_path=self.model_trainer_artifact.trained_model_file,
-            changed_accuracy=evaluate_model_response.difference)
+            changed_accuracy=evaluate_model_response.difference,
+            step_durations=evaluate_model_response.step_durations,
+            evaluation_report_file_path=self.model_eval_config.evaluation_report_file_path)
 
             logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
             return model_evaluation_artifact
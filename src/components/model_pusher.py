@@ -1,11 +1,11 @@
 import sys
 
-from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.logger import logging
 from src.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact
 from src.entity.config_entity import ModelPusherConfig
 from src.entity.s3_estimator import FossilEstimator
+from src.entity.artifact_store import artifact_store
 
 
 class ModelPusher:
@@ -15,11 +15,12 @@ class ModelPusher:
         model_evaluation_artifact: Output reference of data evaluation artifact stage
         model_pusher_config: Configuration for model pusher
         """
-        self.s3 = SimpleStorageService()
         self.model_evaluation_artifact = model_evaluation_artifact
         self.model_pusher_config = model_pusher_config
         self.proj1_estimator = FossilEstimator(bucket_name=model_pusher_config.bucket_name,
-                                model_path=model_pusher_config.s3_model_key_path)
+                                model_path=model_pusher_config.s3_model_key_path,
+                                storage_backend=model_pusher_config.model_storage_backend,
+                                storage_dir=model_pusher_config.model_storage_dir)
 
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         """
@@ -33,14 +34,16 @@ class ModelPusher:
 
         try:
             print("------------------------------------------------------------------------------------------------")
-            logging.info("Uploading artifacts folder to s3 bucket")
+            logging.info("Uploading artifacts folder to the model store")
             
-            logging.info("Uploading new model to S3 bucket....")
+            logging.info(f"Uploading new model to the {self.model_pusher_config.model_storage_backend} model store....")
+            ##the trained model may still be being written by the artifact store
+            artifact_store.wait(self.model_evaluation_artifact.trained_model_path)
             self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
                                                         s3_model_path=self.model_pusher_config.s3_model_key_path)
 
-            logging.info("Uploaded artifacts folder to s3 bucket")
+            logging.info("Uploaded artifacts folder to the model store")
             logging.info(f"Model pusher artifact: [{model_pusher_artifact}]")
             logging.info("Exited initiate_model_pusher method of ModelTrainer class")
             
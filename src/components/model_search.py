@@ -0,0 +1,149 @@
+import os
+import sys
+import math
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+from threadpoolctl import threadpool_limits
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import save_numpy_array_data
+from src.components.estimator_backends import build_estimator, fitted_iterations
+
+"Parallel hyperparameter search for the ModelTrainer, the training arrays are shared with the workers as memory-mapped .npy files."
+
+##arrays opened once per worker process by init_search_worker
+_worker_arrays: Dict[str, np.ndarray] = {}
+
+def init_search_worker(array_file_paths: Dict[str, str], n_threads: int = 1) -> None:
+    """
+    Memory-map the shared training/validation arrays instead of receiving pickled copies per trial.
+    n_threads caps the BLAS/OpenMP threads of the worker (HistGradientBoostingRegressor uses every core
+    otherwise), so n_jobs workers never run more threads than there are cores.
+    """
+    ##the libraries already loaded by the imports, and the ones loaded later through the environment
+    threadpool_limits(limits=n_threads)
+    os.environ["OMP_NUM_THREADS"] = str(n_threads)
+    for name, file_path in array_file_paths.items():
+        _worker_arrays[name] = np.load(file_path, mmap_mode="r")
+
+def run_trial(estimator: str, trial_id: int, params: dict, n_samples: Optional[int] = None, round_id: int = 0) -> dict:
+    """
+    Fit one configuration on the shared training arrays (the first n_samples rows, all of them when None)
+    and score it on the validation arrays. n_estimators_fitted is below the maximum when early stopping kicked in.
+    """
+    started = time.perf_counter()
+    x_train, y_train = _worker_arrays["x_train"], _worker_arrays["y_train"]
+    if n_samples is not None:
+        x_train, y_train = x_train[:n_samples], y_train[:n_samples]
+    model = build_estimator(estimator, params)
+    model.fit(x_train, y_train)
+    fit_time = time.perf_counter() - started
+    score = r2_score(_worker_arrays["y_val"], model.predict(_worker_arrays["x_val"]))
+    return {"trial": trial_id, "round": round_id, "n_samples": len(y_train), "params": params,
+            "n_estimators_fitted": fitted_iterations(model), "r2_score": float(score),
+            "fit_time": round(fit_time, 3), "total_time": round(time.perf_counter() - started, 3)}
+
+class HyperparameterSearch:
+    """
+    Evaluates a grid or random sample of estimator parameters in parallel, "halving" mode evaluates the
+    random sample with successive halving.
+
+    estimator: the estimator backend, see src.components.estimator_backends.
+    base_params: parameters shared by every trial (the ModelTrainerConfig values).
+    search_config: the `search` section of config/model.yaml.
+    work_dir: directory where the shared .npy arrays are written.
+    """
+    def __init__(self, estimator: str, base_params: dict, search_config: dict, work_dir: str):
+        self.estimator = estimator
+        self.base_params = base_params
+        self.search_config = search_config
+        self.work_dir = work_dir
+
+    def get_candidates(self, mode: str) -> List[dict]:
+        param_grid = self.search_config["param_grid"][self.estimator]
+        if mode == "grid":
+            candidates = list(ParameterGrid(param_grid))
+        elif mode in ("random", "halving"):
+            candidates = list(ParameterSampler(param_grid, n_iter=self.search_config.get("n_iter", 20),
+                                               random_state=self.search_config.get("random_state")))
+        else:
+            raise ValueError(f"Unknown hyperparameter search mode: {mode}")
+        return [{**self.base_params, **candidate} for candidate in candidates]
+
+    def share_arrays(self, arrays: Dict[str, np.ndarray]) -> Dict[str, str]:
+        "Write the arrays once as .npy files the workers can memory-map."
+        file_paths = {}
+        for name, array in arrays.items():
+            file_path = os.path.join(self.work_dir, f"{name}.npy")
+            save_numpy_array_data(file_path, np.ascontiguousarray(array))
+            file_paths[name] = file_path
+        return file_paths
+
+    def get_n_jobs(self, n_trials: int) -> int:
+        n_jobs = self.search_config.get("n_jobs", -1)
+        if n_jobs is None or n_jobs <= 0:
+            n_jobs = os.cpu_count() or 1
+        return max(1, min(n_jobs, n_trials))
+
+    def run_halving(self, executor: ProcessPoolExecutor, candidates: List[dict], n_rows: int) -> Tuple[List[dict], List[dict]]:
+        """
+        Successive halving: every candidate is first trained on a small share of the training rows, only the
+        best 1/factor of them go on to the next round with factor times more rows, until the last round
+        trains the survivors on all rows. Returns every trial and the trials of the last round.
+        """
+        factor = self.search_config.get("halving_factor", 3)
+        min_samples = self.search_config.get("halving_min_samples", 100)
+        n_rounds = max(1, math.ceil(math.log(len(candidates), factor)))
+        ##the first round size so that the last round gets every row, never below min_samples
+        n_samples = max(min_samples, n_rows // factor ** (n_rounds - 1))
+        survivors = list(enumerate(candidates))
+        trials: List[dict] = []
+        for round_id in range(n_rounds):
+            round_samples = n_rows if round_id == n_rounds - 1 else min(n_rows, n_samples * factor ** round_id)
+            futures = [executor.submit(run_trial, self.estimator, trial_id, params, round_samples, round_id)
+                       for trial_id, params in survivors]
+            round_trials = [future.result() for future in futures]
+            trials.extend(round_trials)
+            logging.info(f"Halving round {round_id}: {len(survivors)} candidates on {round_samples} rows")
+            if round_id == n_rounds - 1:
+                return trials, round_trials
+            n_keep = max(1, math.ceil(len(survivors) / factor))
+            best = sorted(round_trials, key=lambda trial: trial["r2_score"], reverse=True)[:n_keep]
+            survivors = [(trial["trial"], trial["params"]) for trial in best]
+
+    def run(self, mode: str, x_train: np.ndarray, y_train: np.ndarray,
+            x_val: np.ndarray, y_val: np.ndarray) -> Tuple[dict, List[dict]]:
+        """
+        Runs the trials and returns the best parameters with the per-trial report.
+        """
+        array_file_paths = {}
+        try:
+            candidates = self.get_candidates(mode)
+            array_file_paths = self.share_arrays({"x_train": x_train, "y_train": y_train,
+                                                  "x_val": x_val, "y_val": y_val})
+            n_jobs = self.get_n_jobs(len(candidates))
+            ##the cores are split between the worker processes
+            n_threads = max(1, (os.cpu_count() or 1) // n_jobs)
+            logging.info(f"Running {len(candidates)} {mode} search trials on {n_jobs} processes, {n_threads} thread(s) each")
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=init_search_worker, initargs=(array_file_paths, n_threads)) as executor:
+                if mode == "halving":
+                    trials, finalists = self.run_halving(executor, candidates, n_rows=len(y_train))
+                else:
+                    futures = [executor.submit(run_trial, self.estimator, trial_id, params) for trial_id, params in enumerate(candidates)]
+                    trials = finalists = [future.result() for future in futures]
+            best_trial = max(finalists, key=lambda trial: trial["r2_score"])
+            logging.info(f"Best trial {best_trial['trial']}: r2 {best_trial['r2_score']:.4f} with {best_trial['params']}")
+            return best_trial["params"], trials
+        except Exception as e:
+            raise MyException(e, sys)
+        finally:
+            ##the shared arrays are only needed while the workers run
+            for file_path in array_file_paths.values():
+                if os.path.exists(file_path):
+                    os.remove(file_path)
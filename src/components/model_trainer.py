@@ -1,25 +1,101 @@
 import sys
-from typing import Tuple
+from typing import List, Optional, Tuple
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import r2_score,mean_squared_error
+from sklearn.model_selection import train_test_split
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import load_numpy_array_data,load_object,save_object
+from src.utils.main_utils import load_numpy_array_data,load_object,save_object,read_yaml_file,write_yaml_file
+from src.constants import SCHEMA_FILE_PATH
+from src.components.model_search import HyperparameterSearch
+from src.components.estimator_backends import HIST_GRADIENT_BOOSTING,build_estimator,fitted_iterations
+from src.entity.artifact_store import artifact_store
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact,ModelTrainerArtifact,RegressionMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.compiled_model import CompiledTreeEnsemble
+from src.entity.compiled_preprocessor import CompiledPreprocessor
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
-                       model_trainer_config:ModelTrainerConfig):
-        self.data_transformation_artifact=data_transformation_artifact
-        self.model_trainer_config=model_trainer_config
+                       model_trainer_config:ModelTrainerConfig,
+                       file=SCHEMA_FILE_PATH):
+        try:
+            self.data_transformation_artifact=data_transformation_artifact
+            self.model_trainer_config=model_trainer_config
+            self.schema_config=read_yaml_file(file)
+            self.search_trials: Optional[List[dict]] = None
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_categorical_feature_indices(self)->List[int]:
+        """
+        Columns of the transformed arrays holding the OrdinalEncoder codes: the preprocessor outputs the
+        numerical columns first, then the categorical columns (see DataTransformation.get_data_transformer_object).
+        """
+        n_numerical=len(self.schema_config['numerical_columns'])
+        return list(range(n_numerical,n_numerical+len(self.schema_config['categorical_columns'])))
+
+    def get_base_params(self)->dict:
+        "Parameters of the configured estimator backend from the ModelTrainerConfig."
+        if self.model_trainer_config.estimator==HIST_GRADIENT_BOOSTING:
+            ##the category codes are split on natively instead of being treated as ordered numbers
+            return dict(max_iter=self.model_trainer_config.n_estimetors,
+                        learning_rate=self.model_trainer_config.learning_rate,
+                        max_leaf_nodes=self.model_trainer_config.hist_max_leaf_nodes,
+                        min_samples_leaf=self.model_trainer_config.hist_min_samples_leaf,
+                        categorical_features=self.get_categorical_feature_indices(),
+                        early_stopping=bool(self.model_trainer_config.n_iter_no_change),
+                        n_iter_no_change=self.model_trainer_config.n_iter_no_change or 10,
+                        validation_fraction=self.model_trainer_config.validation_fraction,
+                        tol=self.model_trainer_config.tol,
+                        random_state=self.model_trainer_config.random_state)
+        return dict(subsample=self.model_trainer_config.subsample,
+                    n_estimators=self.model_trainer_config.n_estimetors,
+                    min_samples_split=self.model_trainer_config.min_samples_split,
+                    min_samples_leaf=self.model_trainer_config.min_samples_leaf,
+                    max_features=self.model_trainer_config.max_features,
+                    max_depth=self.model_trainer_config.max_depth,
+                    random_state=self.model_trainer_config.random_state,
+                    learning_rate=self.model_trainer_config.learning_rate,
+                    n_iter_no_change=self.model_trainer_config.n_iter_no_change or None,
+                    validation_fraction=self.model_trainer_config.validation_fraction,
+                    tol=self.model_trainer_config.tol)
+
+    def search_params(self, x_train:np.array, y_train:np.array)->dict:
+        """
+        Method: search_params
+        Description: runs the hyperparameter search configured in config/model.yaml on a validation split
+        of the training data, the per-trial scores and fit times are written to the search report.
+        Output: Returns the parameters of the configured estimator backend to train the final model with
+        """
+        try:
+            base_params=self.get_base_params()
+            search_config=read_yaml_file(self.model_trainer_config.model_config_file_path)["search"]
+            mode=self.model_trainer_config.search_mode or search_config.get("mode","none")
+            if mode=="none":
+                return base_params
+
+            x_fit,x_val,y_fit,y_val=train_test_split(x_train,y_train,
+                                                     test_size=search_config.get("validation_fraction",0.2),
+                                                     random_state=search_config.get("random_state"))
+            search=HyperparameterSearch(estimator=self.model_trainer_config.estimator,base_params=base_params,search_config=search_config,
+                                        work_dir=self.model_trainer_config.search_dir)
+            best_params,trials=search.run(mode,x_fit,y_fit,x_val,y_val)
+            self.search_trials=trials
+            write_yaml_file(self.model_trainer_config.search_report_file_path,
+                            {"mode":mode,"best_params":best_params,"trials":trials},replace=True)
+            return best_params
+        except Exception as e:
+            raise MyException(e,sys)
 
     def get_model_object_and_report(self, train:np.array, test:np.array)->Tuple[object,object]:
         """
         Method: get_model_object_and_report
-        Description: this function takes training & testing data and train on GradientBoostingRegression.
+        Description: this function takes training & testing data and train the configured estimator backend
+                     (GradientBoostingRegressor by default).
         Output: Returns metric artifact and trained model object
         """
         try:
@@ -29,21 +105,13 @@ class ModelTrainer:
             x_test = test[:, :-1]
             y_test = test[:, -1]
 
-            logging.info("Training GradientBoostingRegressor with specified parameters😊")
-            model=GradientBoostingRegressor(
-                subsample=self.model_trainer_config.subsample,
-                n_estimators=self.model_trainer_config.n_estimetors,
-                min_samples_split=self.model_trainer_config.min_samples_split,
-                min_samples_leaf=self.model_trainer_config.min_samples_leaf,
-                max_features=self.model_trainer_config.max_features,
-                max_depth=self.model_trainer_config.max_depth,
-                random_state=self.model_trainer_config.random_state,
-                learning_rate=self.model_trainer_config.learning_rate
-            )
+            params=self.search_params(x_train,y_train)
+            logging.info(f"Training {self.model_trainer_config.estimator} with parameters {params}😊")
+            model=build_estimator(self.model_trainer_config.estimator,params)
             logging.info("Model Training with x_train and y_train")
             logging.info("Fit the model🤞")
             model.fit(x_train,y_train)
-            logging.info("Model Training completed.")
+            logging.info(f"Model Training completed with {fitted_iterations(model)} boosting iterations.")
 
             logging.info("Prediction and Evaluation started.")
             y_pred=model.predict(x_test)
@@ -56,12 +124,67 @@ class ModelTrainer:
         except Exception as e:
             raise MyException(e,sys)
         
+    def export_compiled_model(self, trained_model:object, x_check:np.array)->Optional[CompiledTreeEnsemble]:
+        """
+        Method: export_compiled_model
+        Description: flattens the fitted GradientBoostingRegressor into a CompiledTreeEnsemble and checks that
+        it reproduces trained_model.predict on x_check, rejecting rows with missing values like it does.
+        Output: Returns the compiled ensemble, None for estimators that cannot be compiled
+        """
+        try:
+            if not isinstance(trained_model,GradientBoostingRegressor):
+                logging.info(f"No compiled inference engine for {type(trained_model).__name__}, skipping export")
+                return None
+            try:
+                compiled_model=CompiledTreeEnsemble.from_estimator(trained_model)
+            except ValueError as e:
+                ##served by the sklearn engine instead
+                logging.info(f"No compiled inference engine for this model, skipping export: {e}")
+                return None
+            if not np.allclose(compiled_model.predict(x_check),trained_model.predict(x_check),rtol=1e-9,atol=1e-6):
+                raise Exception("Compiled model predictions differ from the trained model predictions")
+            ##a row with a missing value must be rejected by both, as sklearn does
+            nan_row=np.array(x_check[:1],dtype=np.float64)
+            nan_row[0,0]=np.nan
+            for predict in (compiled_model.predict,trained_model.predict):
+                try:
+                    predict(nan_row)
+                except ValueError:
+                    continue
+                raise Exception("Compiled model and trained model disagree on a row with a missing value")
+            logging.info(f"Exported compiled model with {len(compiled_model.roots)} trees and {len(compiled_model.value)} nodes")
+            return compiled_model
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def export_compiled_preprocessor(self, preprocessing_obj:object)->Optional[CompiledPreprocessor]:
+        """
+        Method: export_compiled_preprocessor
+        Description: compiles the fitted preprocessing pipeline into a CompiledPreprocessor and checks that
+        it reproduces preprocessing_obj.transform on records covering every fitted category.
+        Output: Returns the compiled preprocessor, None when the pipeline cannot be compiled
+        """
+        try:
+            try:
+                compiled_preprocessor=CompiledPreprocessor.from_pipeline(preprocessing_obj,self.schema_config)
+            except (ValueError,KeyError) as e:
+                logging.info(f"Preprocessing pipeline cannot be compiled, skipping export: {e}")
+                return None
+            records=compiled_preprocessor.sample_records()
+            expected=preprocessing_obj.transform(pd.DataFrame.from_records(records))
+            if not np.allclose(compiled_preprocessor.transform(records),expected,rtol=1e-12,atol=1e-12):
+                raise Exception("Compiled preprocessor output differs from the preprocessing pipeline output")
+            logging.info("Exported compiled preprocessor")
+            return compiled_preprocessor
+        except Exception as e:
+            raise MyException(e,sys)
+
     def initiate_model_trainer(self)->ModelTrainerArtifact:
         logging.info("The initiate_model_trainer method runs to execute ModelTrainer class")
         try:
             logging.info("Loading the transformed train and test data")
-            train_arr=load_numpy_array_data(self.data_transformation_artifact.transformed_train_file_path)
-            test_arr=load_numpy_array_data(self.data_transformation_artifact.transformed_test_file_path)
+            train_arr=artifact_store.get(self.data_transformation_artifact.transformed_train_file_path,reader=load_numpy_array_data)
+            test_arr=artifact_store.get(self.data_transformation_artifact.transformed_test_file_path,reader=load_numpy_array_data)
             logging.info("Data loading is completed")
 
             logging.info("Training model and create the Accuracy Report🤞")
@@ -69,7 +192,7 @@ class ModelTrainer:
             logging.info("Model object and artifact loaded.")
 
             logging.info("Load Preprocessing Object")
-            preprocessing_obj=load_object(self.data_transformation_artifact.transformed_object_file_path)
+            preprocessing_obj=artifact_store.get(self.data_transformation_artifact.transformed_object_file_path,reader=load_object)
             logging.info("Preprocessing object is loaded")
 
             logging.info("Checking r2_squared threshold score")  
@@ -77,13 +200,19 @@ class ModelTrainer:
                 logging.info("The Expected threshold score not meet😔")
                 raise Exception("No model found with score above the base score😩")
             logging.info("Saving new model as performace is better than the previous one.")
-            my_new_model=MyModel(preprocessing_object=preprocessing_obj,trained_model_object=trained_model)
-            save_object(self.model_trainer_config.trained_model_file_path, my_new_model)
+            compiled_model=self.export_compiled_model(trained_model,x_check=test_arr[:,:-1])
+            compiled_preprocessor=self.export_compiled_preprocessor(preprocessing_obj)
+            my_new_model=MyModel(preprocessing_object=preprocessing_obj,trained_model_object=trained_model,
+                                 compiled_model_object=compiled_model,
+                                 compiled_preprocessing_object=compiled_preprocessor)
+            artifact_store.put(self.model_trainer_config.trained_model_file_path, my_new_model, writer=save_object)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
             logging.info("Create and return the ModelTrainerArtifact") 
             model_trainer_artifact=ModelTrainerArtifact(self.model_trainer_config.trained_model_file_path,
-                                                        metric_artifact=metric_artifact)
+                                                        metric_artifact=metric_artifact,
+                                                        search_report_file_path=self.model_trainer_config.search_report_file_path if self.search_trials else None,
+                                                        search_trials=self.search_trials)
             logging.info("Model trainer artifact created👍")  
             return model_trainer_artifact                  
         except Exception as e:
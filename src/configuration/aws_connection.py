@@ -1,4 +1,3 @@
-import boto3
 import os
 from src.constants import *
 
@@ -15,7 +14,9 @@ class S3client:
                 raise Exception(f"Environment variable: {access_key_id} is not set in the .env file.🔴")
             if secret_key_id is None:
                 raise Exception(f"Environment variable: {secret_key_id} is not set in the .env file.🔴")
-            
+
+            ##boto3 is only imported by the first S3client, importing the module stays cheap for the serving app
+            import boto3
             S3client.s3_resource=boto3.resource('s3',
                                             aws_access_key_id=access_key_id,
                                             aws_secret_access_key=secret_key_id,
@@ -13,6 +13,7 @@ BACKUPCOUNT=3
 MONGODB_URL=os.getenv("URL")
 DATABASE_NAME="Fossil"
 COLLECTION_NAME="Fossil_tab"
+MONGO_EXPORT_BATCH_SIZE: int = 10000
 
 ##pipeline variables
 PIIPELINE_NAME: str =""
@@ -23,6 +24,9 @@ SCHEMA_FILE_PATH=os.path.join("config","schema.yaml")
 
 ##Arrtifact name
 ARTIFACT_DIR: str = "artifact"
+ARTIFACT_STORE_WRITER_THREADS: int = 2
+STAGE_CACHE_DIR_NAME: str = "stage_cache"
+STAGE_CACHE_REPORT_FILE_NAME: str = "stage_cache_report.yaml"
 
 "Data Ingestion constant names over entire project"
 DATA_INGESTION_COLLECTION_NAME: str ="Fossil_tab"
@@ -30,6 +34,13 @@ DATA_INGESTION_DIR_NAME: str ="Data Ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str="feature_store"
 DATA_INGESTION_INGESTED_DIR: str="Ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: str = 0.20
+##opt-in: when "true" only the documents past the high-water mark are fetched into the persistent artifact/feature_store
+DATA_INGESTION_INCREMENTAL: bool = os.getenv("DATA_INGESTION_INCREMENTAL", "false").lower() == "true"
+DATA_INGESTION_WATERMARK_FIELD: str = os.getenv("DATA_INGESTION_WATERMARK_FIELD", "_id")
+FEATURE_STORE_DATA_FILE_NAME: str = "data.parquet"
+FEATURE_STORE_STATE_FILE_NAME: str = "state.yaml"
+##file format of the ingested data.csv/train.csv/test.csv artifacts: csv, parquet or feather
+DATA_INGESTION_ARTIFACT_FORMAT: str = os.getenv("DATA_INGESTION_ARTIFACT_FORMAT", "csv")
 
 "Data Validation constants"
 DATA_VALIDATION_DIR_NAME:str = "data_validation"
@@ -56,7 +67,21 @@ MAX_FEATURES:str = 'sqrt'
 MAX_DEPTH:int = 4
 LEARNING_RATE:float = 0.05
 RANDOM_STATE:int = 42
+##early stopping, off by default: when set, stop adding trees once the score on VALIDATION_FRACTION of the
+##training data has not improved by TOL for N_ITER_NO_CHANGE iterations (0 grows all N_ESTIMATORS trees)
+N_ITER_NO_CHANGE:int = int(os.getenv("N_ITER_NO_CHANGE", 0))
+VALIDATION_FRACTION:float = 0.1
+TOL:float = 1e-4
+##estimator backend: gradient_boosting or hist_gradient_boosting (multithreaded, native categorical splits)
+MODEL_TRAINER_ESTIMATOR:str = os.getenv("MODEL_TRAINER_ESTIMATOR", "gradient_boosting")
+HIST_MAX_LEAF_NODES:int = 31
+HIST_MIN_SAMPLES_LEAF:int = 20
 MODEL_FILE_NAME:str = "model.pkl"
+MODEL_CONFIG_FILE_PATH:str = os.path.join("config","model.yaml")
+##overrides the search mode of config/model.yaml when set (none, grid, random or halving)
+MODEL_TRAINER_SEARCH_MODE = os.getenv("MODEL_TRAINER_SEARCH_MODE")
+MODEL_TRAINER_SEARCH_DIR:str = "search"
+MODEL_TRAINER_SEARCH_REPORT_FILE_NAME:str = "search_report.yaml"
 
 
 "AWS credentials"
@@ -64,12 +89,54 @@ AWS_ACCESS_KEY_ID=os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY_ID=os.getenv("AWS_SECRET_ACCESS_KEY_ID")
 AWS_REGION=os.getenv("AWS_REGION")
 
+"S3 transfer constants"
+##objects above the threshold are uploaded in multipart and downloaded with parallel ranged GETs of CHUNKSIZE bytes
+S3_MULTIPART_THRESHOLD: int = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+S3_MULTIPART_CHUNKSIZE: int = int(os.getenv("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+S3_MAX_CONCURRENCY: int = int(os.getenv("S3_MAX_CONCURRENCY", 10))
+##SHA-256 of the uploaded file stored in the object metadata and checked after every download
+S3_VERIFY_CHECKSUM: bool = os.getenv("S3_VERIFY_CHECKSUM", "true").lower() == "true"
+##seconds the ETag/LastModified of a key is trusted before it is revalidated with a conditional GET
+S3_METADATA_CACHE_TTL: float = float(os.getenv("S3_METADATA_CACHE_TTL", 30))
+##rows per DataFrame yielded by SimpleStorageService.iter_csv_chunks
+S3_CSV_CHUNK_SIZE: int = int(os.getenv("S3_CSV_CHUNK_SIZE", 100000))
+
 
 "Model Evaluation Related Constants"
-MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float =0.2
+##minimum lower bound of the R² improvement interval for the trained model to be accepted (0: any significant gain)
+MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = float(os.getenv("MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE", 0.0))
+MODEL_EVALUATION_DIR_NAME: str = "model_evaluation"
+MODEL_EVALUATION_REPORT_FILE_NAME: str = "evaluation_report.yaml"
+##bootstrap confidence intervals of the test metrics, the gate compares the paired champion/challenger resamples
+MODEL_EVALUATION_BOOTSTRAP_RESAMPLES: int = int(os.getenv("MODEL_EVALUATION_BOOTSTRAP_RESAMPLES", 2000))
+MODEL_EVALUATION_CONFIDENCE_LEVEL: float = float(os.getenv("MODEL_EVALUATION_CONFIDENCE_LEVEL", 0.95))
+##cells of the (resamples, rows) count matrix per bootstrap chunk: 4M cells peak around 64MB (int64 counts + float64 copy)
+MODEL_EVALUATION_BOOTSTRAP_CHUNK_CELLS: int = int(os.getenv("MODEL_EVALUATION_BOOTSTRAP_CHUNK_CELLS", 4_000_000))
+MODEL_EVALUATION_SEGMENT_COLUMNS = ["geological_period", "surrounding_rock_type", "stratigraphic_position"]
 MODEL_BUCKET_NAME = "fossilproject"
 MODEL_PUSHER_S3_KEY="model-registry"
 
+"Model serving constants"
+MODEL_REGISTRY_REFRESH_INTERVAL: int = int(os.getenv("MODEL_REGISTRY_REFRESH_INTERVAL", 300))
+##s3: the model bucket, local: <MODEL_STORAGE_DIR>/<bucket name>/<model file> on a local volume or node-local cache
+MODEL_STORAGE_BACKEND: str = os.getenv("MODEL_STORAGE_BACKEND", "s3")
+MODEL_STORAGE_DIR: str = os.getenv("MODEL_STORAGE_DIR", "model_store")
+PREDICTION_BATCH_WINDOW_MS: float = float(os.getenv("PREDICTION_BATCH_WINDOW_MS", 2))
+PREDICTION_BATCH_MAX_ROWS: int = int(os.getenv("PREDICTION_BATCH_MAX_ROWS", 64))
+##sklearn: the fitted estimator's predict, compiled: the flattened tree arrays exported by the ModelTrainer
+INFERENCE_ENGINE: str = os.getenv("INFERENCE_ENGINE", "compiled")
+##record predictions cache, PREDICTION_CACHE_SIZE=0 disables it
+PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL: float = float(os.getenv("PREDICTION_CACHE_TTL", 600))
+##rows of the synthetic batch run at start-up, and seconds between warm-up attempts while it fails
+WARMUP_BATCH_ROWS: int = int(os.getenv("WARMUP_BATCH_ROWS", 64))
+WARMUP_RETRY_INTERVAL: float = float(os.getenv("WARMUP_RETRY_INTERVAL", 10))
+INFERENCE_POOL_SIZE: int = int(os.getenv("INFERENCE_POOL_SIZE", 4))
+INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", 64))
+TRAINING_POOL_SIZE: int = int(os.getenv("TRAINING_POOL_SIZE", 1))
+TRAINING_QUEUE_SIZE: int = int(os.getenv("TRAINING_QUEUE_SIZE", 1))
+TRAINING_JOB_STORE_FILE_PATH: str = os.getenv("TRAINING_JOB_STORE_FILE_PATH", os.path.join(ARTIFACT_DIR, "training_jobs.db"))
+
 "App Host constants"
 APP_HOST="localhost"
 APP_PORT=5000
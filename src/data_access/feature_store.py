@@ -0,0 +1,125 @@
+"""
+Persistent feature store used for incremental ingestion: only documents newer than the recorded
+high-water mark are fetched from MongoDB and merged into a columnar (Parquet) copy of the collection.
+"""
+import os
+import sys
+import pandas as pd
+from bson import ObjectId
+from typing import Optional
+
+from src.exception import MyException
+from src.logger import logging
+from src.data_access.fetch_data import FetchData
+from src.utils.main_utils import read_yaml_file,write_yaml_file
+from src.constants import MONGO_EXPORT_BATCH_SIZE,FEATURE_STORE_DATA_FILE_NAME,FEATURE_STORE_STATE_FILE_NAME
+
+ID_COLUMN="_id"
+
+class FeatureStore:
+    """Keeps every ingested document (keyed by its '_id') across training runs.
+
+    store_dir: directory of the persistent store, shared by all the training runs.
+    watermark_field: '_id' to use the ObjectId insertion order (new documents only), or a timestamp field
+                     such as 'updated_at' maintained by the writers to also pick up changed documents.
+    """
+    def __init__(self, store_dir: str, watermark_field: str=ID_COLUMN)->None:
+        self.store_dir=store_dir
+        self.watermark_field=watermark_field
+        self.data_file_path=os.path.join(store_dir,FEATURE_STORE_DATA_FILE_NAME)
+        self.state_file_path=os.path.join(store_dir,FEATURE_STORE_STATE_FILE_NAME)
+
+    def get_watermark(self):
+        """Returns the high-water mark of the last sync, None if the store is empty"""
+        try:
+            if not os.path.exists(self.state_file_path) or not os.path.exists(self.data_file_path):
+                return None
+            state=read_yaml_file(self.state_file_path) or {}
+            if state.get("watermark_field")!=self.watermark_field:
+                logging.info("Feature store watermark field changed, a full export is required")
+                return None
+            return state.get("watermark")
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def build_query(self)->dict:
+        """MongoDB filter selecting the documents inserted (or updated) after the high-water mark"""
+        watermark=self.get_watermark()
+        if watermark is None:
+            return {}
+        if self.watermark_field==ID_COLUMN:
+            watermark=ObjectId(watermark)
+        return {self.watermark_field: {"$gt": watermark}}
+
+    def drop_key_columns(self, df: pd.DataFrame)->pd.DataFrame:
+        """Remove the '_id' and watermark bookkeeping columns that are not part of the dataset schema"""
+        key_columns=[column for column in {ID_COLUMN,self.watermark_field} if column in df.columns]
+        return df.drop(columns=key_columns)
+
+    def load(self, drop_id: bool=True)->pd.DataFrame:
+        """Read the whole store, without the '_id'/watermark columns by default"""
+        try:
+            df=pd.read_parquet(self.data_file_path)
+            return self.drop_key_columns(df) if drop_id else df
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def merge(self, delta_df: pd.DataFrame)->pd.DataFrame:
+        """Upsert the delta into the store (by '_id') and move the high-water mark forward
+
+        Returns:
+        pd.DataFrame
+            The complete, merged store including the '_id' column.
+        """
+        try:
+            delta_df=delta_df.copy()
+            delta_df[ID_COLUMN]=delta_df[ID_COLUMN].astype(str)
+            ##hex ObjectId strings sort in the same order as the ObjectIds themselves
+            watermark=delta_df[self.watermark_field].max()
+
+            if self.get_watermark() is not None:
+                store_df=self.load(drop_id=False)
+                store_df=store_df[~store_df[ID_COLUMN].isin(delta_df[ID_COLUMN])]
+                merged_df=pd.concat([store_df,delta_df],ignore_index=True)
+            else:
+                merged_df=delta_df.reset_index(drop=True)
+
+            os.makedirs(self.store_dir,exist_ok=True)
+            ##write then rename, so a crash never leaves a half written store behind
+            temp_file_path=self.data_file_path+".tmp"
+            merged_df.to_parquet(temp_file_path,index=False)
+            os.replace(temp_file_path,self.data_file_path)
+            write_yaml_file(self.state_file_path,
+                            {"watermark_field": self.watermark_field,
+                             "watermark": self.to_yaml_value(watermark),
+                             "rows": len(merged_df)},
+                            replace=True)
+            logging.info(f"Feature store merged {len(delta_df)} new/changed rows, {len(merged_df)} rows in total")
+            return merged_df
+        except Exception as e:
+            raise MyException(e,sys)
+
+    @staticmethod
+    def to_yaml_value(value):
+        """Convert pandas/numpy scalars to plain Python values before writing them to yaml"""
+        if hasattr(value,"to_pydatetime"):
+            return value.to_pydatetime()
+        if hasattr(value,"item"):
+            return value.item()
+        return value
+
+    def sync(self, fetch_data: FetchData, collection_name: str, database_name: Optional[str]=None,
+             batch_size: int=MONGO_EXPORT_BATCH_SIZE)->pd.DataFrame:
+        """Fetch only the documents past the high-water mark, merge them and return the full dataset"""
+        try:
+            query=self.build_query()
+            logging.info(f"Incremental export from {collection_name} with filter {query}")
+            chunks=list(fetch_data.iter_collection_chunks(collection_name,database_name=database_name,
+                                                          batch_size=batch_size,query=query,include_id=True))
+            if len(chunks)==0:
+                logging.info("No new documents since the last ingestion")
+                return self.load()
+            delta_df=pd.concat(chunks,ignore_index=True) if len(chunks)>1 else chunks[0]
+            return self.drop_key_columns(self.merge(delta_df))
+        except Exception as e:
+            raise MyException(e,sys)
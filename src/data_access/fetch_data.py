@@ -4,43 +4,97 @@ Once the mongodb client connection is set up. we have to fetch the data from the
 import sys
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Optional,Iterator,List,Union
 
 from src.exception import MyException
 from src.configuration.mongo_db_connection import MongoDBClient
 from src.logger import logging
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME,SCHEMA_FILE_PATH,MONGO_EXPORT_BATCH_SIZE
+from src.utils.main_utils import read_yaml_file
 
 class FetchData:
     """Class that export the Mongodb records into a pandas dataframe"""
 
-    def __init__(self)->None:
+    def __init__(self,schema_file_path:str=SCHEMA_FILE_PATH)->None:
         try:
             self.mongoclient=MongoDBClient(database_name=DATABASE_NAME)
+            self.schema_config=read_yaml_file(schema_file_path)
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_collection(self, collection_name: str, database_name: Optional[str]=None):
+        if database_name is None:
+            return self.mongoclient.database[collection_name]
+        return self.mongoclient.client[database_name][collection_name]
+
+    def records_to_dataframe(self, records: List[dict])-> pd.DataFrame:
+        """Build a DataFrame from a chunk of records.
+
+        Only the columns that occur in the records are created, so that a column missing from the collection
+        is still reported by the data validation. Schema numerical columns are coerced to float64 ('na',
+        missing and non-numeric values become NaN, left for the validation to report), every other column
+        keeps its inferred dtype with 'na' replaced by NaN.
+        """
+        df=pd.DataFrame.from_records(records)
+        ##schema columns first, then any column the schema does not know about so validation can still catch it
+        schema_columns=[column for column in self.schema_config['columns'] if column in df.columns]
+        df=df[schema_columns+[column for column in df.columns if column not in set(schema_columns)]]
+        numerical_columns=set(self.schema_config['numerical_columns'])
+        for column in df.columns:
+            if column in numerical_columns:
+                df[column]=pd.to_numeric(df[column],errors="coerce").astype(np.float64)
+            elif df[column].dtype==object:
+                df[column]=df[column].replace({"na": np.nan})
+        return df
+
+    def iter_collection_chunks(self, collection_name: str, database_name: Optional[str]=None,
+                               batch_size: int=MONGO_EXPORT_BATCH_SIZE, query: Optional[dict]=None,
+                               include_id: bool=False)-> Iterator[pd.DataFrame]:
+        """Stream the records of a collection as DataFrames of at most batch_size rows.
+
+        The '_id' field is excluded by the projection on the server unless include_id is set, and only
+        one batch of documents is held as Python dicts at any time.
+        query: optional MongoDB filter, e.g. {"_id": {"$gt": last_seen_id}} for incremental exports.
+        """
+        try:
+            collection=self.get_collection(collection_name,database_name)
+            projection=None if include_id else {"_id": 0}
+            cursor=collection.find(query or {}, projection, batch_size=batch_size)
+            records=[]
+            for record in cursor:
+                records.append(record)
+                if len(records)>=batch_size:
+                    yield self.records_to_dataframe(records)
+                    records=[]
+            if len(records)>0:
+                yield self.records_to_dataframe(records)
         except Exception as e:
             raise MyException(e,sys)
         
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str]=None)-> pd.DataFrame:
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str]=None,
+                                       batch_size: int=MONGO_EXPORT_BATCH_SIZE,
+                                       chunked: bool=False)-> Union[pd.DataFrame,Iterator[pd.DataFrame]]:
         """fetch the records from mogodb database into pandas dataframe
 
+        batch_size: number of documents fetched and converted per chunk.
+        chunked: return an iterator of DataFrame chunks instead of one DataFrame.
+
         Returns:
         pd.DataFrame
             DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
         """
         try:
-            if database_name is None:
-                collection = self.mongoclient.database[collection_name]
-            else:
-                collection = self.mongoclient.client[database_name][collection_name]
-            
-            ##convert records into dataframe
             logging.info("Start feaching data from mongodb collection")
-            df=pd.DataFrame(list(collection.find()))
-            if "_id" in df.columns.to_list():
-                df=df.drop(columns="_id", axis=1)
-            df.replace({"na": np.nan}, inplace=True)
+            chunks=self.iter_collection_chunks(collection_name,database_name=database_name,batch_size=batch_size)
+            if chunked:
+                return chunks
+            chunks=list(chunks)
+            if len(chunks)==0:
+                df=pd.DataFrame(columns=self.schema_config['columns'])
+            else:
+                df=pd.concat(chunks,ignore_index=True) if len(chunks)>1 else chunks[0]
             logging.info("Data fetched from mongodb")
             return df
             
         except Exception as e:
-            raise MyException(e,sys)
\ No newline at end of file
+            raise MyException(e,sys)
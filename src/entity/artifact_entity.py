@@ -1,5 +1,6 @@
 """In artifact section we expect only the outputs in a classes format"""
 from dataclasses import dataclass
+from typing import Dict, List, Optional
 
 ##data ingestion artifact
 @dataclass
@@ -31,6 +32,8 @@ class RegressionMetricArtifact:
 class ModelTrainerArtifact:
     trained_model_file:str
     metric_artifact:RegressionMetricArtifact
+    search_report_file_path:Optional[str] = None
+    search_trials:Optional[List[dict]] = None
 
 
 @dataclass
@@ -39,6 +42,8 @@ class ModelEvaluationArtifact:
     changed_accuracy:float
     s3_model_path:str
     trained_model_path:str
+    step_durations:Optional[Dict[str,float]] = None
+    evaluation_report_file_path:Optional[str] = None
 
 @dataclass
 class ModelEvaluationResponse:
@@ -46,6 +51,8 @@ class ModelEvaluationResponse:
     best_model_r2_squared_score: float
     is_model_accepted:bool
     difference:float
+    step_durations:Optional[Dict[str,float]] = None
+    evaluation_report:Optional[dict] = None
 
 @dataclass
 class ModelPusherArtifact:
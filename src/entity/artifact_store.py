@@ -0,0 +1,91 @@
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+from src.exception import MyException
+from src.logger import logging
+from src.constants import ARTIFACT_STORE_WRITER_THREADS
+
+"In-memory artifact handoff between TrainPipeline stages, with the artifact files written in the background."
+
+class ArtifactStore:
+    """
+    ArtifactStore keeps the artifacts produced during a pipeline run (DataFrames, arrays, fitted objects)
+    in memory, keyed by their artifact file path, while the files are persisted by background threads.
+
+    The next stage gets the object straight from memory instead of reading back the file the previous
+    stage has just written; the file is only read when the artifact was not produced in this process.
+    Stages must not modify the objects they get from the store in place.
+    """
+    def __init__(self, max_workers: int = ARTIFACT_STORE_WRITER_THREADS):
+        self.max_workers = max_workers
+        self.objects: Dict[str, object] = {}
+        self.writes: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="artifact-writer")
+        return self.executor
+
+    def put(self, file_path: str, obj: object, writer: Callable[[str, object], None]) -> None:
+        """
+        file_path: Artifact file path, also the key of the artifact.
+        obj: The artifact object handed to the next stages.
+        writer: Function persisting the object, called as writer(file_path, obj) in a background thread.
+        """
+        try:
+            with self.lock:
+                previous = self.writes.get(file_path)
+                if previous is not None and not previous.done():
+                    ##never let two writes of the same file run concurrently
+                    previous.result()
+                self.objects[file_path] = obj
+                self.writes[file_path] = self._get_executor().submit(writer, file_path, obj)
+            logging.info(f"Artifact {file_path} handed off in memory, persisting in background")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get(self, file_path: str, reader: Callable[[str], object]) -> object:
+        """
+        Returns the in-memory artifact for the file path, or reader(file_path) when it is not in the store.
+        """
+        try:
+            obj = self.objects.get(file_path)
+            if obj is not None:
+                return obj
+            return reader(file_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def wait(self, file_path: str) -> None:
+        "Block until the artifact file has been written (no-op if it was not written through the store)."
+        try:
+            future = self.writes.get(file_path)
+            if future is not None:
+                future.result()
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def flush(self, raise_errors: bool = True) -> None:
+        "Wait for every pending write, raising the first write error unless raise_errors is False."
+        errors = []
+        for file_path, future in list(self.writes.items()):
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Writing artifact {file_path} failed: {e}")
+                errors.append(e)
+        if errors and raise_errors:
+            raise errors[0]
+
+    def clear(self) -> None:
+        "Wait for pending writes and drop every in-memory artifact."
+        self.flush(raise_errors=False)
+        with self.lock:
+            self.objects.clear()
+            self.writes.clear()
+
+
+artifact_store = ArtifactStore()
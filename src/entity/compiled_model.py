@@ -0,0 +1,102 @@
+import numpy as np
+
+"Compiled tree-ensemble inference: a fitted GradientBoostingRegressor flattened into contiguous NumPy arrays."
+
+class CompiledTreeEnsemble:
+    """
+    The nodes of every tree are concatenated into flat arrays (feature, threshold, first child, leaf value)
+    and a batch is evaluated on all trees at once: each step moves every (row, tree)
+    pair one level down, so predict costs max_depth vectorized gathers instead of a walk per tree and
+    sklearn's per-call input validation.
+
+    The nodes are renumbered breadth first so that the right child always follows the left child: the next
+    node is left[node] + (x[feature] > threshold). Leaves point to themselves with an infinite threshold, so
+    pairs that reached a leaf early stay there until the deepest tree is done. The leaf values are stored
+    pre-multiplied by the learning rate. Like GradientBoostingRegressor.predict, inputs with NaN or infinite
+    values are rejected, so no missing value routing is needed.
+    """
+    ##rows evaluated per step, keeps the (rows, trees) index arrays cache sized on large batches
+    chunk_rows: int = 128
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, value: np.ndarray,
+                 roots: np.ndarray, init_value: float, max_depth: int, n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.init_value = init_value
+        self.max_depth = max_depth
+        self.n_features = n_features
+
+    @staticmethod
+    def _breadth_first_order(tree) -> np.ndarray:
+        "sklearn node ids in breadth first order, the children of a node being next to each other."
+        order, position = [0], 0
+        while position < len(order):
+            node = order[position]
+            if tree.children_left[node] != -1:
+                order.extend((tree.children_left[node], tree.children_right[node]))
+            position += 1
+        return np.array(order)
+
+    @staticmethod
+    def _init_value(model) -> float:
+        """
+        Constant raw prediction the stages are added to, from the public init_ estimator: 0 for init="zero",
+        the fitted constant of the default DummyRegressor. Any other init estimator may depend on the input.
+        """
+        if isinstance(model.init_, str) and model.init_ == "zero":
+            return 0.0
+        if hasattr(model.init_, "constant_"):
+            return float(np.ravel(model.init_.constant_)[0])
+        raise ValueError(f"Cannot compile a model with a {type(model.init_).__name__} init estimator")
+
+    @classmethod
+    def from_estimator(cls, model) -> "CompiledTreeEnsemble":
+        "Flattens a fitted (single output) GradientBoostingRegressor."
+        trees = [stage[0].tree_ for stage in model.estimators_[:model.n_estimators_]]
+        feature, threshold, left, value, roots = [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            order = cls._breadth_first_order(tree)
+            new_ids = np.empty(tree.node_count, dtype=np.intp)
+            new_ids[order] = np.arange(tree.node_count)
+            is_leaf = tree.children_left[order] == -1
+            feature.append(np.where(is_leaf, 0, tree.feature[order]))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            left.append(np.where(is_leaf, np.arange(tree.node_count), new_ids[tree.children_left[order]]) + offset)
+            value.append(tree.value[order, 0, 0] * model.learning_rate)
+            roots.append(offset)
+            offset += tree.node_count
+        init_value = cls._init_value(model)
+        return cls(feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+                   threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+                   left=np.ascontiguousarray(np.concatenate(left), dtype=np.intp),
+                   value=np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+                   roots=np.array(roots, dtype=np.intp),
+                   init_value=init_value,
+                   max_depth=max(tree.max_depth for tree in trees),
+                   n_features=model.n_features_in_)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        "Predictions for a 2D array of transformed features, as GradientBoostingRegressor.predict."
+        ##sklearn trees compare float32 inputs against float64 thresholds
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        ##same contract as GradientBoostingRegressor.predict, which rejects NaN and infinite inputs
+        if not np.isfinite(x).all():
+            raise ValueError("Input X contains NaN or infinity.")
+        if x.shape[0] <= self.chunk_rows:
+            return self._predict_chunk(x)
+        return np.concatenate([self._predict_chunk(x[start:start + self.chunk_rows])
+                               for start in range(0, x.shape[0], self.chunk_rows)])
+
+    def _predict_chunk(self, x: np.ndarray) -> np.ndarray:
+        flat_x = x.ravel()
+        row_offsets = (np.arange(x.shape[0], dtype=np.intp) * x.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (x.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            values = flat_x.take(row_offsets + self.feature.take(nodes))
+            go_right = values > self.threshold.take(nodes)
+            nodes = self.left.take(nodes) + go_right
+        return self.init_value + self.value.take(nodes).sum(axis=1)
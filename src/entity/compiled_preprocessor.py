@@ -0,0 +1,132 @@
+import math
+from typing import Dict, List, Mapping, Sequence, Union
+import numpy as np
+from pandas import DataFrame
+
+"Compiled preprocessing: the fitted DataTransformation pipeline reduced to NumPy vectors and dict lookups."
+
+class CompiledPreprocessor:
+    """
+    Lightweight replacement of the fitted Pipeline(ColumnTransformer(StandardScaler, OrdinalEncoder)) for
+    inference. The scaler becomes a mean and a scale vector over the schema numerical_columns, the encoder
+    a category -> code dict per schema categorical_columns entry, so a record is transformed without pandas
+    column selection or sklearn input validation. The output columns are in the ColumnTransformer order
+    (numerical columns, then categorical codes).
+
+    numerical_columns / categorical_columns: the config/schema.yaml column lists, in pipeline order.
+    mean / scale: StandardScaler.mean_ / scale_ (0 and 1 when the scaler was fitted without them).
+    category_codes: one dict per categorical column mapping each fitted category to its code.
+    """
+    def __init__(self, numerical_columns: List[str], categorical_columns: List[str], mean: np.ndarray,
+                 scale: np.ndarray, category_codes: List[Dict[object, float]]):
+        self.numerical_columns = numerical_columns
+        self.categorical_columns = categorical_columns
+        self.mean = mean
+        self.scale = scale
+        self.category_codes = category_codes
+        self.n_numerical = len(numerical_columns)
+        self.n_features_out = len(numerical_columns) + len(categorical_columns)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, schema_config: dict) -> "CompiledPreprocessor":
+        """
+        Compiles the fitted pipeline of DataTransformation.get_data_transformer_object. Raises ValueError when
+        the pipeline does not have the expected scaling/encoding steps over the schema column lists.
+        """
+        column_transformer = pipeline.steps[0][1] if hasattr(pipeline, "steps") else pipeline
+        transformers = {name: (transformer, list(columns))
+                        for name, transformer, columns in column_transformer.transformers_}
+        scaler, numerical_columns = transformers["scaling"]
+        encoder, categorical_columns = transformers["Encoding"]
+        if numerical_columns != list(schema_config["numerical_columns"]) or \
+                categorical_columns != list(schema_config["categorical_columns"]):
+            raise ValueError("The fitted preprocessing columns do not match the schema column lists")
+        remainder = transformers.get("remainder")
+        if remainder is not None and len(remainder[1]) > 0:
+            raise ValueError(f"Cannot compile a preprocessor with remainder columns: {remainder[1]}")
+        if getattr(encoder, "handle_unknown", "error") != "error":
+            raise ValueError("Only OrdinalEncoder(handle_unknown='error') can be compiled")
+
+        n_numerical = len(numerical_columns)
+        mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None and scaler.with_mean else np.zeros(n_numerical)
+        scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None and scaler.with_std else np.ones(n_numerical)
+        category_codes = [{category.item() if hasattr(category, "item") else category: float(code)
+                           for code, category in enumerate(categories)}
+                          for categories in encoder.categories_]
+        return cls(numerical_columns=numerical_columns, categorical_columns=categorical_columns,
+                   mean=np.asarray(mean, dtype=np.float64), scale=np.asarray(scale, dtype=np.float64),
+                   category_codes=category_codes)
+
+    def sample_records(self, n_records: int = 0) -> List[dict]:
+        """
+        Synthetic records covering every fitted category, with numerical values spread around the fitted
+        means: used to check the compiled output and to warm up a freshly loaded model.
+        n_records: number of records, at least the size of the largest category list.
+        """
+        n_records = max([n_records, 2] + [len(codes) for codes in self.category_codes])
+        records = []
+        for row in range(n_records):
+            record = {column: float(self.mean[index] + self.scale[index] * (row / n_records - 0.5))
+                      for index, column in enumerate(self.numerical_columns)}
+            for index, column in enumerate(self.categorical_columns):
+                categories = list(self.category_codes[index])
+                record[column] = categories[row % len(categories)]
+            records.append(record)
+        return records
+
+    def _encode(self, index: int, value: object) -> float:
+        codes = self.category_codes[index]
+        code = codes.get(value)
+        if code is None:
+            ##NaN never equals itself, look for a fitted NaN category explicitly
+            if isinstance(value, float) and math.isnan(value):
+                code = next((code for category, code in codes.items()
+                             if isinstance(category, float) and math.isnan(category)), None)
+            if code is None:
+                raise ValueError(f"Found unknown categories [{value!r}] in column {self.categorical_columns[index]} during transform")
+        return code
+
+    def transform_records(self, records: Sequence[Mapping[str, object]], out: np.ndarray = None) -> np.ndarray:
+        """
+        Transforms a sequence of records (dicts keyed by the schema column names) into the model input array.
+        out: optional preallocated (len(records), n_features_out) float64 array to write into.
+        """
+        if out is None:
+            out = np.empty((len(records), self.n_features_out), dtype=np.float64)
+        numerical = out[:, :self.n_numerical]
+        for row, record in enumerate(records):
+            for column, name in enumerate(self.numerical_columns):
+                numerical[row, column] = record[name]
+            for column, name in enumerate(self.categorical_columns):
+                out[row, self.n_numerical + column] = self._encode(column, record[name])
+        numerical -= self.mean
+        numerical /= self.scale
+        return out
+
+    def transform_columns(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        "Transforms columnar data (a dict of equally long sequences keyed by column name, or a DataFrame)."
+        n_rows = len(columns[self.numerical_columns[0]] if self.numerical_columns else columns[self.categorical_columns[0]])
+        out = np.empty((n_rows, self.n_features_out), dtype=np.float64)
+        for column, name in enumerate(self.numerical_columns):
+            out[:, column] = np.asarray(columns[name], dtype=np.float64)
+        for column, name in enumerate(self.categorical_columns):
+            values = columns[name]
+            values = values.tolist() if hasattr(values, "tolist") else values
+            out[:, self.n_numerical + column] = [self._encode(column, value) for value in values]
+        out[:, :self.n_numerical] -= self.mean
+        out[:, :self.n_numerical] /= self.scale
+        return out
+
+    def transform(self, data: Union[DataFrame, Mapping, Sequence[Mapping]]) -> np.ndarray:
+        """
+        Same output as the fitted pipeline's transform for a DataFrame, a columnar dict, a single record
+        dict (scalar values) or a list of record dicts.
+        """
+        if isinstance(data, DataFrame):
+            return self.transform_columns(data)
+        if isinstance(data, Mapping):
+            first = next(iter(data.values()))
+            if isinstance(first, (list, tuple, np.ndarray)):
+                return self.transform_columns(data)
+            return self.transform_records([data])
+        return self.transform_records(data)
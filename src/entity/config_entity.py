@@ -18,11 +18,28 @@ training_pipeline_config: TrainingPipelineConfig=TrainingPipelineConfig()
 @dataclass
 class DataIngestionConfig:
     data_ingestion_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_INGESTION_DIR_NAME)
-    feature_store_file_path: str = os.path.join(data_ingestion_dir,DATA_INGESTION_FEATURE_STORE_DIR,FILE_NAME)
-    training_file_path: str = os.path.join(data_ingestion_dir,DATA_INGESTION_INGESTED_DIR,TRAIN_FILE_NAME)
-    test_file_path: str = os.path.join(data_ingestion_dir,DATA_INGESTION_INGESTED_DIR,TEST_FILE_NAME)
+    artifact_format: str = DATA_INGESTION_ARTIFACT_FORMAT
+    ##built from artifact_format in __post_init__ unless given: save_dataframe picks the format from the extension
+    feature_store_file_path: str = None
+    training_file_path: str = None
+    test_file_path: str = None
     train_test_split_size: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    incremental: bool = DATA_INGESTION_INCREMENTAL
+    watermark_field: str = DATA_INGESTION_WATERMARK_FIELD
+    ##shared by every run (not under the timestamped artifact dir) so that only the delta is fetched
+    persistent_feature_store_dir: str = os.path.join(ARTIFACT_DIR,DATA_INGESTION_FEATURE_STORE_DIR)
+
+    def __post_init__(self):
+        if self.feature_store_file_path is None:
+            self.feature_store_file_path=os.path.join(self.data_ingestion_dir,DATA_INGESTION_FEATURE_STORE_DIR,
+                                                      FILE_NAME.replace("csv",self.artifact_format))
+        if self.training_file_path is None:
+            self.training_file_path=os.path.join(self.data_ingestion_dir,DATA_INGESTION_INGESTED_DIR,
+                                                 TRAIN_FILE_NAME.replace("csv",self.artifact_format))
+        if self.test_file_path is None:
+            self.test_file_path=os.path.join(self.data_ingestion_dir,DATA_INGESTION_INGESTED_DIR,
+                                             TEST_FILE_NAME.replace("csv",self.artifact_format))
 
 ##data validation configuration
 @dataclass
@@ -45,6 +62,11 @@ class ModelTrainerConfig:
     model_trainer_dir:str = os.path.join(training_pipeline_config.artifact_dir,MODEL_TRAINER_DIR_NAME)
     trained_model_file_path:str = os.path.join(model_trainer_dir,MODEL_TRAINER_TRAINED_MODEL_DIR,MODEL_FILE_NAME)
     expected_score:float = MODEL_TRAINER_EXPECTED_SCORE
+    model_config_file_path:str = MODEL_CONFIG_FILE_PATH
+    search_mode = MODEL_TRAINER_SEARCH_MODE
+    search_dir:str = os.path.join(model_trainer_dir,MODEL_TRAINER_SEARCH_DIR)
+    search_report_file_path:str = os.path.join(model_trainer_dir,MODEL_TRAINER_SEARCH_REPORT_FILE_NAME)
+    estimator:str = MODEL_TRAINER_ESTIMATOR
     n_estimetors=N_ESTIMATORS
     subsample=SUBSAMPLE
     min_samples_leaf=MIN_SAMPLES_LEAF
@@ -53,21 +75,55 @@ class ModelTrainerConfig:
     max_depth=MAX_DEPTH
     learning_rate=LEARNING_RATE
     random_state=RANDOM_STATE
+    n_iter_no_change=N_ITER_NO_CHANGE
+    validation_fraction=VALIDATION_FRACTION
+    tol=TOL
+    hist_max_leaf_nodes=HIST_MAX_LEAF_NODES
+    hist_min_samples_leaf=HIST_MIN_SAMPLES_LEAF
 
 @dataclass
 class ModelEvaluationConfig:
     changed_threshold_score: float = MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    model_evaluation_dir: str = os.path.join(training_pipeline_config.artifact_dir,MODEL_EVALUATION_DIR_NAME)
+    evaluation_report_file_path: str = os.path.join(model_evaluation_dir,MODEL_EVALUATION_REPORT_FILE_NAME)
+    bootstrap_resamples: int = MODEL_EVALUATION_BOOTSTRAP_RESAMPLES
+    confidence_level: float = MODEL_EVALUATION_CONFIDENCE_LEVEL
+    bootstrap_chunk_cells: int = MODEL_EVALUATION_BOOTSTRAP_CHUNK_CELLS
+    random_state: int = RANDOM_STATE
+    segment_columns = MODEL_EVALUATION_SEGMENT_COLUMNS
+    ##the champion is read from the same model store the app serves from
+    model_storage_backend: str = MODEL_STORAGE_BACKEND
+    model_storage_dir: str = MODEL_STORAGE_DIR
 
 @dataclass
 class ModelPusherConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    ##the accepted model is pushed to the model store the app serves from
+    model_storage_backend: str = MODEL_STORAGE_BACKEND
+    model_storage_dir: str = MODEL_STORAGE_DIR
 
 @dataclass
 class FossilPredictionConfig:
     model_file_path:str = MODEL_FILE_NAME
     model_bucket_name:str = MODEL_BUCKET_NAME
+    model_refresh_interval:int = MODEL_REGISTRY_REFRESH_INTERVAL
+    model_storage_backend:str = MODEL_STORAGE_BACKEND
+    model_storage_dir:str = MODEL_STORAGE_DIR
+    batch_window_ms:float = PREDICTION_BATCH_WINDOW_MS
+    batch_max_rows:int = PREDICTION_BATCH_MAX_ROWS
+    inference_engine:str = INFERENCE_ENGINE
+    prediction_cache_size:int = PREDICTION_CACHE_SIZE
+    prediction_cache_ttl:float = PREDICTION_CACHE_TTL
+    warmup_batch_rows:int = WARMUP_BATCH_ROWS
+    warmup_retry_interval:float = WARMUP_RETRY_INTERVAL
 
-    
\ No newline at end of file
+@dataclass
+class S3TransferConfig:
+    multipart_threshold:int = S3_MULTIPART_THRESHOLD
+    multipart_chunksize:int = S3_MULTIPART_CHUNKSIZE
+    max_concurrency:int = S3_MAX_CONCURRENCY
+    verify_checksum:bool = S3_VERIFY_CHECKSUM
+    metadata_cache_ttl:float = S3_METADATA_CACHE_TTL
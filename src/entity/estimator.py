@@ -1,23 +1,85 @@
 import sys
+import threading
+import numpy as np
 import pandas as pd
+from typing import TYPE_CHECKING
 from pandas import DataFrame
-from sklearn.pipeline import Pipeline
 from src.logger import logging
 from src.exception import MyException
 
+##sklearn is only needed once a pickled model is loaded, not to import this module
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+##per inference thread model input buffer reused by the record-oriented path
+_row_buffers=threading.local()
+
+def get_row_buffer(n_rows:int, n_features:int)->np.ndarray:
+    "Preallocated (n_rows, n_features) float64 array, grown when a larger batch comes in."
+    buffer=getattr(_row_buffers,"buffer",None)
+    if buffer is None or buffer.shape[0]<n_rows or buffer.shape[1]!=n_features:
+        buffer=np.empty((max(n_rows,1),n_features),dtype=np.float64)
+        _row_buffers.buffer=buffer
+    return buffer[:n_rows]
+
 class MyModel:
-    def __init__(self,preprocessing_object:Pipeline, trained_model_object:object):
+    def __init__(self,preprocessing_object:"Pipeline", trained_model_object:object, compiled_model_object:object=None,
+                 compiled_preprocessing_object:object=None):
         self.preprocessing_object=preprocessing_object
         self.trained_model_object=trained_model_object
+        self.compiled_model_object=compiled_model_object
+        self.compiled_preprocessing_object=compiled_preprocessing_object
+
+    def get_preprocessor(self,engine:str="sklearn")->object:
+        "The fitted preprocessing pipeline, or its CompiledPreprocessor for engine='compiled' when one was exported."
+        if engine=="compiled":
+            compiled_preprocessor=getattr(self,"compiled_preprocessing_object",None)
+            if compiled_preprocessor is not None:
+                return compiled_preprocessor
+            logging.info("No compiled preprocessor exported with this model, transforming with the sklearn pipeline")
+        elif engine!="sklearn":
+            raise ValueError(f"Unknown inference engine: {engine}")
+        return self.preprocessing_object
+
+    def get_predictor(self,engine:str="sklearn")->object:
+        "The fitted estimator, or its CompiledTreeEnsemble for engine='compiled' when one was exported."
+        if engine=="compiled":
+            ##models pickled before the export step have no compiled_model_object
+            compiled_model=getattr(self,"compiled_model_object",None)
+            if compiled_model is not None:
+                return compiled_model
+            logging.info("No compiled model exported with this model, predicting with the sklearn estimator")
+        elif engine!="sklearn":
+            raise ValueError(f"Unknown inference engine: {engine}")
+        return self.trained_model_object
+
+    def transform_records(self,records:list,engine:str="sklearn")->np.ndarray:
+        """
+        Model input array for a list of records (FossilRecord or dicts). The compiled preprocessor writes the
+        records straight into this thread's preallocated buffer, the sklearn pipeline still needs a DataFrame.
+        """
+        preprocessor=self.get_preprocessor(engine)
+        if hasattr(preprocessor,"transform_records"):
+            return preprocessor.transform_records(records,out=get_row_buffer(len(records),preprocessor.n_features_out))
+        return preprocessor.transform(DataFrame.from_records([record if isinstance(record,dict) else record.to_dict()
+                                                              for record in records]))
 
-    def transform_predict(self,dataframe:pd.DataFrame)-> DataFrame:
+    def transform_predict(self,dataframe:pd.DataFrame,engine:str="sklearn")-> DataFrame:
+        """
+        dataframe: the input features, or a list of records (FossilRecord or dicts) for the record-oriented path.
+                   With engine='compiled' a single record dict is accepted as well.
+        engine: "sklearn" or "compiled" (the CompiledPreprocessor and CompiledTreeEnsemble exported by the ModelTrainer).
+        """
         try:
             logging.info("Starting prediction Process.")
             logging.info("Step-1: Applying transformation using pre-trained preprocesing object")
-            transformed_features=self.preprocessing_object.transform(dataframe)
+            if isinstance(dataframe,list):
+                transformed_features=self.transform_records(dataframe,engine)
+            else:
+                transformed_features=self.get_preprocessor(engine).transform(dataframe)
 
             logging.info("Step-2: Perform Prediction on data using pre-trained model")
-            prediction=self.trained_model_object.predict(transformed_features)
+            prediction=self.get_predictor(engine).predict(transformed_features)
             logging.info("Transform and Prediction process completed👍")
             return prediction
         except Exception as e:
@@ -0,0 +1,144 @@
+import sys
+import time
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from src.exception import MyException
+from src.logger import logging
+from src.entity.estimator import MyModel
+from src.cloud_storage.storage_backend import S3_STORAGE
+
+"Process-wide model cache so that the served model is downloaded once per version and not once per request."
+
+@dataclass(frozen=True)
+class CachedModel:
+    bucket_name: str
+    model_path: str
+    storage_backend: str
+    version: Optional[str]
+    model: MyModel
+    loaded_at: float
+
+
+class ModelRegistry:
+    """
+    ModelRegistry keeps one loaded model per model store and (bucket name, model path) for the whole process.
+
+    Attributes: models/ shared cache of CachedModel keyed by (storage_backend, storage_dir, bucket_name, model_path),
+                estimators/ estimator used to (re)load each cached model.
+
+    The cached model is tagged with the S3 ETag/version it was loaded from. A background thread checks the
+    version every `refresh_interval` seconds and swaps in the new model atomically when it has changed, so
+    the request path is a dictionary lookup and never an S3 round trip.
+    """
+    ##static variables shared across the process
+    models: Dict[Tuple[str, Optional[str], str, str], CachedModel] = {}
+    estimators: Dict[Tuple[str, Optional[str], str, str], object] = {}
+    lock = threading.Lock()
+    refresh_thread: Optional[threading.Thread] = None
+    stop_event = threading.Event()
+
+    @staticmethod
+    def get_key(estimator) -> Tuple[str, Optional[str], str, str]:
+        "Cache key of the estimator's model: the same bucket and path in an S3 and a local store are different models."
+        return (estimator.storage_backend, estimator.storage_dir, estimator.bucket_name, estimator.model_path)
+
+    @classmethod
+    def get_model(cls, estimator, refresh_interval: int = 0) -> MyModel:
+        """
+        Returns the cached model for the estimator's bucket and model path, loading it on first use.
+        estimator: FossilEstimator used to read the model version and download the model.
+        refresh_interval: Seconds between background version checks, 0 disables the background refresh.
+        """
+        return cls.get_cached_model(estimator, refresh_interval=refresh_interval).model
+
+    @classmethod
+    def get_cached_model(cls, estimator, refresh_interval: int = 0) -> CachedModel:
+        "As get_model, but returns the model together with the version it was loaded from."
+        try:
+            key = cls.get_key(estimator)
+            cached = cls.models.get(key)
+            if cached is None:
+                ##only one thread downloads the model, the others wait and reuse it
+                with cls.lock:
+                    cached = cls.models.get(key)
+                    if cached is None:
+                        cached = cls._load(estimator)
+                        cls.models[key] = cached
+                        cls.estimators[key] = estimator
+            if refresh_interval and refresh_interval > 0:
+                cls.start_background_refresh(refresh_interval)
+            return cached
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @classmethod
+    def get_version(cls, bucket_name: str, model_path: str, storage_backend: str = S3_STORAGE,
+                    storage_dir: Optional[str] = None) -> Optional[str]:
+        "Returns the version (ETag) of the cached model, None if nothing is cached yet."
+        cached = cls.models.get((storage_backend, storage_dir, bucket_name, model_path))
+        return None if cached is None else cached.version
+
+    @staticmethod
+    def _load(estimator, version: Optional[str] = None) -> CachedModel:
+        "Download and unpickle the model, tagging it with the version it was loaded from."
+        if version is None:
+            version = estimator.get_model_version()
+        logging.info(f"Loading model {estimator.model_path} (version {version}) into the model registry")
+        model = estimator.load_model()
+        return CachedModel(bucket_name=estimator.bucket_name,
+                           model_path=estimator.model_path,
+                           storage_backend=estimator.storage_backend,
+                           version=version,
+                           model=model,
+                           loaded_at=time.time())
+
+    @classmethod
+    def refresh(cls) -> int:
+        """
+        Checks every cached model against its current version and swaps in the new model when it changed.
+        Returns the number of models that were reloaded.
+        """
+        reloaded = 0
+        for key, estimator in list(cls.estimators.items()):
+            try:
+                version = estimator.get_model_version()
+                cached = cls.models.get(key)
+                if version is None or (cached is not None and cached.version == version):
+                    continue
+                ##download outside the lock so that requests keep being served by the old model
+                new_cached = cls._load(estimator, version=version)
+                with cls.lock:
+                    cls.models[key] = new_cached
+                reloaded += 1
+                logging.info(f"Model registry swapped {key} to version {version}")
+            except Exception as e:
+                logging.error(f"Model registry refresh failed for {key}: {e}")
+        return reloaded
+
+    @classmethod
+    def start_background_refresh(cls, refresh_interval: int) -> None:
+        "Starts the daemon thread that periodically refreshes the cached models (no-op if already running)."
+        if cls.refresh_thread is not None and cls.refresh_thread.is_alive():
+            return
+        with cls.lock:
+            if cls.refresh_thread is not None and cls.refresh_thread.is_alive():
+                return
+            cls.stop_event.clear()
+
+            def refresh_loop():
+                while not cls.stop_event.wait(refresh_interval):
+                    cls.refresh()
+
+            cls.refresh_thread = threading.Thread(target=refresh_loop, name="model-registry-refresh", daemon=True)
+            cls.refresh_thread.start()
+            logging.info(f"Model registry background refresh started, interval {refresh_interval}s")
+
+    @classmethod
+    def clear(cls) -> None:
+        "Stops the background refresh and drops every cached model."
+        cls.stop_event.set()
+        with cls.lock:
+            cls.models.clear()
+            cls.estimators.clear()
+        cls.refresh_thread = None
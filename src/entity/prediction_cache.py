@@ -0,0 +1,107 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+"Process-wide cache of predictions for records that are submitted again with the same features."
+
+def canonical_key(record) -> Tuple:
+    """
+    Hashable key of a record: the typed attribute values of a FossilRecord (the form strings are already
+    converted to float/str/bool), or the sorted items of a dict.
+    """
+    slots = getattr(record, "__slots__", None)
+    if slots is not None:
+        return tuple(getattr(record, name) for name in slots)
+    return tuple(sorted(record.items()))
+
+
+class PredictionCache:
+    """
+    LRU cache of single-record predictions with a time to live.
+
+    Entries belong to a namespace (bucket, model path, model version, inference engine): as soon as a lookup
+    comes with another namespace, i.e. the model registry swapped in a new model version, every entry of
+    the previous namespace is dropped.
+
+    max_size: Maximum number of cached predictions, the least recently used entry is evicted first. 0 disables the cache.
+    ttl_seconds: Seconds an entry stays valid after it was stored.
+    """
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self.namespace: Optional[Hashable] = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _use_namespace(self, namespace: Hashable) -> None:
+        "Drop the entries of the previous model version, call with the lock held."
+        if namespace != self.namespace:
+            if self.entries:
+                self.invalidations += 1
+                self.entries.clear()
+            self.namespace = namespace
+
+    def get_many(self, namespace: Hashable, keys: Sequence[Hashable]) -> List[Optional[float]]:
+        "Cached prediction for each key, None for the keys that are not cached (or expired)."
+        now = time.monotonic()
+        results: List[Optional[float]] = []
+        with self.lock:
+            self._use_namespace(namespace)
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] < now:
+                    del self.entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    results.append(entry[0])
+        return results
+
+    def put_many(self, namespace: Hashable, keys: Sequence[Hashable], values: Sequence[float]) -> None:
+        "Store the predictions of the given keys, evicting the least recently used entries beyond max_size."
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self.lock:
+            self._use_namespace(namespace)
+            for key, value in zip(keys, values):
+                self.entries[key] = (float(value), expires_at)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.namespace = None
+
+    def get_stats(self) -> dict:
+        "Hit/miss counters since start-up."
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -1,32 +1,69 @@
 import sys
+import numpy as np
+from typing import Optional
 from src.exception import MyException
 from pandas import DataFrame
 from src.entity.estimator import MyModel
-from src.cloud_storage.aws_storage import SimpleStorageService
+from src.entity.model_registry import ModelRegistry
+from src.entity.prediction_cache import PredictionCache,canonical_key
+from src.cloud_storage.storage_backend import S3_STORAGE,ModelStorage,build_storage_backend
 
 
 class FossilEstimator:
-    "This class save and retrieve model from s3 bucket and to do prediction."
-    def __init__(self, bucket_name,model_path,):
+    "This class save and retrieve model from the model store (s3 bucket or local directory) and to do prediction."
+    def __init__(self, bucket_name,model_path,cache_model:bool=False,refresh_interval:int=0,
+                 inference_engine:str="sklearn",prediction_cache:Optional[PredictionCache]=None,
+                 storage_backend:str=S3_STORAGE,storage_dir:Optional[str]=None):
         """
         bucket_name: Name of the bucket,
         model_path: Location of the model in aws bucket.
+        cache_model: Serve the model from the process-wide ModelRegistry instead of downloading it per instance.
+        refresh_interval: Seconds between background checks for a new model version (only used with cache_model).
+        inference_engine: "sklearn" or "compiled" (the flattened tree arrays exported with the model).
+        prediction_cache: Shared cache of record predictions (only used with cache_model, for lists of records).
+        storage_backend: "s3" or "local" (models read from <storage_dir>/<bucket_name>/<model_path>).
+        storage_dir: Root directory of the local model store.
         """
         self.bucket_name=bucket_name
         self.model_path=model_path
-        self.s3=SimpleStorageService()
+        self.cache_model=cache_model
+        self.refresh_interval=refresh_interval
+        self.inference_engine=inference_engine
+        self.prediction_cache=prediction_cache
+        self.storage_backend=storage_backend
+        self.storage_dir=storage_dir
+        self._storage:Optional[ModelStorage]=None
         self.loaded_model:MyModel=None
 
+    @property
+    def storage(self)->ModelStorage:
+        "Model store created on first use: boto3 is not imported until a model is actually fetched from S3."
+        if self._storage is None:
+            self._storage=build_storage_backend(self.storage_backend,root_dir=self.storage_dir)
+        return self._storage
+
     def is_model_present(self,model_path):
         try:
-            return self.s3.s3_key_path_checker(bucket_name=self.bucket_name,s3_key=model_path)
+            return self.storage.key_exists(bucket_name=self.bucket_name,key=model_path)
         except Exception as e:
             print(e) 
             return False
         
+    def get_model_version(self):
+        "Version (ETag, or mtime and size in the local store) of the model at the model path, None if it is not present."
+        return self.storage.get_object_version(bucket_name=self.bucket_name,s3_key=self.model_path)
+
     def load_model(self,)->MyModel:
         "Load the model from model path"
-        return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
+        return self.storage.load_model(self.model_path,bucket_name=self.bucket_name)
+
+    def get_loaded_model(self)->MyModel:
+        "Returns the model to predict with, from the model registry when cache_model is set."
+        if self.cache_model:
+            return ModelRegistry.get_model(self,refresh_interval=self.refresh_interval)
+        if self.loaded_model is None:
+            self.loaded_model = self.load_model()
+        return self.loaded_model
     
     def save_model(self,from_file,remove:bool=False)->None:
         """
@@ -36,19 +73,38 @@ class FossilEstimator:
                 you will have your model locally available in your system folder
         """
         try:
-            self.s3.upload_file(from_file,
-                                to_filename=self.model_path,
-                                bucket_name=self.bucket_name,
-                                remove=remove)
+            self.storage.upload_file(from_file,
+                                     to_filename=self.model_path,
+                                     bucket_name=self.bucket_name,
+                                     remove=remove)
         except Exception as e:
             raise MyException(e,sys)
         
+    def predict_cached(self,records:list)->np.ndarray:
+        """
+        Predicts a list of records, reusing the cached predictions of records already seen with the same model
+        version and inference engine. Only the records that are not cached go through the model.
+        """
+        cached_model=ModelRegistry.get_cached_model(self,refresh_interval=self.refresh_interval)
+        namespace=(self.bucket_name,self.model_path,cached_model.version,self.inference_engine)
+        keys=[canonical_key(record) for record in records]
+        predictions=self.prediction_cache.get_many(namespace,keys)
+        missing=[index for index,prediction in enumerate(predictions) if prediction is None]
+        if missing:
+            values=cached_model.model.transform_predict(dataframe=[records[index] for index in missing],
+                                                        engine=self.inference_engine)
+            self.prediction_cache.put_many(namespace,[keys[index] for index in missing],values)
+            for index,value in zip(missing,values):
+                predictions[index]=value
+        return np.asarray(predictions,dtype=np.float64)
+
     def predict(self,dataframe:DataFrame):
         "dataframe"
         try:
-            if self.loaded_model is None:
-                self.loaded_model = self.load_model()
-            return self.loaded_model.transform_predict(dataframe=dataframe)
+            if (self.cache_model and self.prediction_cache is not None and self.prediction_cache.enabled
+                    and isinstance(dataframe,list)):
+                return self.predict_cached(dataframe)
+            return self.get_loaded_model().transform_predict(dataframe=dataframe,engine=self.inference_engine)
         except Exception as e:
             raise MyException(e,sys)
          
@@ -13,9 +13,20 @@ MAX_LOG_SIZE=LOG_SIZE
 BACKUP_COUNT=BACKUPCOUNT
 
 ##Construct the log file path
-log_dir_path=os.path.join(from_root(),LOG_DIR) #choose file path dir in root folder and create Log folder
-os.makedirs(log_dir_path,exist_ok=True) ##pass file path dir and create the log folder
-log_file_path=os.path.join(log_dir_path,LOG_FILE) ##pass the dir path and create log file with LOG_FILE name
+log_dir_path=os.path.join(from_root(),LOG_DIR) #choose file path dir in root folder for the Log folder
+log_file_path=os.path.join(log_dir_path,LOG_FILE) ##pass the dir path and name the log file with LOG_FILE name
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that creates the log folder and file on the first record instead of at import time,
+    so importing src (e.g. the serving app) does not touch the filesystem until something is logged.
+    """
+    def __init__(self, filename, maxBytes=0, backupCount=0):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename),exist_ok=True) ##create the log folder on first use
+        return super()._open()
 
 def configure_logger():
     """
@@ -28,8 +39,8 @@ def configure_logger():
     # Define formatter
     formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
-    # File handler with rotation
-    file_handler = RotatingFileHandler(log_file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+    # File handler with rotation, the file is only opened when the first record is emitted
+    file_handler = LazyRotatingFileHandler(log_file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
     file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.DEBUG)
     
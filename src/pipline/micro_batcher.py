@@ -0,0 +1,169 @@
+import time
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from src.logger import logging
+from src.constants import PREDICTION_BATCH_WINDOW_MS, PREDICTION_BATCH_MAX_ROWS, INFERENCE_QUEUE_SIZE
+from src.pipline.workers import BoundedExecutor, ExecutorBusyError
+
+"Micro-batching: coalesce concurrent single-row prediction requests into one vectorized prediction."
+
+@dataclass
+class BatchMetrics:
+    batches: int = 0
+    rows: int = 0
+    max_batch_size: int = 0
+    last_batch_size: int = 0
+    total_queue_wait_ms: float = 0.0
+    max_queue_wait_ms: float = 0.0
+
+    def record(self, batch_size: int, queue_waits_ms: List[float]) -> None:
+        self.batches += 1
+        self.rows += batch_size
+        self.last_batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_queue_wait_ms += sum(queue_waits_ms)
+        self.max_queue_wait_ms = max([self.max_queue_wait_ms] + queue_waits_ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "avg_queue_wait_ms": self.total_queue_wait_ms / self.rows if self.rows else 0.0,
+            "max_queue_wait_ms": self.max_queue_wait_ms,
+        }
+
+
+class PredictionBatcher:
+    """
+    Collects prediction requests that arrive within `max_wait_ms` of each other (or until `max_batch_size`
+    rows are queued), runs one vectorized prediction for all of them and fans the results back to the
+    awaiting handlers.
+
+    predict_fn: Function taking a DataFrame (or a list of records) and returning one prediction per row,
+                e.g. FossilAgeRegression().predict
+    max_wait_ms: Coalescing window measured from the first queued request of a batch.
+    max_batch_size: Maximum number of rows predicted together.
+    executor: Pool the batches are predicted in, None predicts on the event loop.
+    max_queue_size: Maximum number of waiting requests, further requests raise ExecutorBusyError.
+    """
+    def __init__(self, predict_fn: Callable[[DataFrame], np.ndarray],
+                 max_wait_ms: float = PREDICTION_BATCH_WINDOW_MS,
+                 max_batch_size: int = PREDICTION_BATCH_MAX_ROWS,
+                 executor: Optional[BoundedExecutor] = None,
+                 max_queue_size: int = INFERENCE_QUEUE_SIZE):
+        self.predict_fn = predict_fn
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+        self.max_queue_size = max_queue_size
+        self.metrics = BatchMetrics()
+        self.metrics_lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatching = set()
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        "Start the batching task on the running event loop (restarted if the loop changed)."
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def predict(self, dataframe: Union[DataFrame, list]) -> np.ndarray:
+        "Queue the rows of the dataframe (or the records of the list) and wait for their predictions."
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((dataframe, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise ExecutorBusyError(f"Prediction queue is full ({self.max_queue_size} requests waiting), retry later.")
+        return await future
+
+    async def _collect(self) -> List[Tuple[DataFrame, asyncio.Future, float]]:
+        "Wait for the first request, then keep collecting until the window closes or the batch is full."
+        first = await self._queue.get()
+        items = [first]
+        rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    async def _predict_batch(self, batch: DataFrame) -> np.ndarray:
+        "Run the prediction for one coalesced batch, in the executor when one is configured."
+        if self.executor is None:
+            return self.predict_fn(batch)
+        return await self.executor.run(self.predict_fn, batch)
+
+    async def _run(self) -> None:
+        if self.executor is None:
+            while True:
+                await self._dispatch(await self._collect())
+        ##at most one batch per pool worker in flight, the next batch keeps filling up meanwhile
+        in_flight = asyncio.Semaphore(self.executor.max_workers)
+        while True:
+            await in_flight.acquire()
+            items = await self._collect()
+            task = asyncio.ensure_future(self._dispatch(items))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+            task.add_done_callback(lambda _: in_flight.release())
+
+    async def _dispatch(self, items: List[Tuple[DataFrame, asyncio.Future, float]]) -> None:
+        dispatched_at = time.perf_counter()
+        queue_waits_ms = [(dispatched_at - enqueued_at) * 1000 for _, _, enqueued_at in items]
+        try:
+            if isinstance(items[0][0], DataFrame):
+                batch = pd.concat([dataframe for dataframe, _, _ in items], ignore_index=True)
+            else:
+                batch = [record for records, _, _ in items for record in records]
+            predictions = np.asarray(await self._predict_batch(batch))
+            with self.metrics_lock:
+                self.metrics.record(batch_size=len(batch), queue_waits_ms=queue_waits_ms)
+            ##fan the results back in request order
+            start = 0
+            for dataframe, future, _ in items:
+                end = start + len(dataframe)
+                if not future.done():
+                    future.set_result(predictions[start:end])
+                start = end
+        except Exception as e:
+            if len(items) == 1:
+                if not items[0][1].done():
+                    items[0][1].set_exception(e)
+                return
+            ##one bad request (e.g. an unknown category) must not fail the requests coalesced with it:
+            ##predict every request on its own so that only the failing ones get the exception
+            logging.error(f"Micro-batch prediction failed for {len(items)} requests, predicting them one by one: {e}")
+            for dataframe, future, _ in items:
+                try:
+                    predictions = np.asarray(await self._predict_batch(dataframe))
+                    if not future.done():
+                        future.set_result(predictions)
+                except Exception as item_error:
+                    if not future.done():
+                        future.set_exception(item_error)
+
+    def get_metrics(self) -> dict:
+        "Batch size and queue wait statistics since start-up."
+        with self.metrics_lock:
+            return self.metrics.to_dict()
@@ -1,9 +1,18 @@
 import sys
+import math
+import time
+from typing import Union,List,Dict,Mapping
+from src.constants import SCHEMA_FILE_PATH,TARGET_COLUMN
+from src.utils.main_utils import read_yaml_file
 from src.entity.config_entity import FossilPredictionConfig
 from src.entity.s3_estimator import FossilEstimator
+from src.entity.prediction_cache import PredictionCache
+from src.entity.model_registry import ModelRegistry
+from src.entity.compiled_preprocessor import CompiledPreprocessor
 from src.exception import MyException
 from src.logger import logging
-from pandas import DataFrame
+import numpy as np
+from pandas import DataFrame,to_numeric
 
 class FossilPrediction:
     def __init__(self,
@@ -63,20 +72,180 @@ class FossilPrediction:
              except Exception as e:
                   raise MyException(e,sys)
              
+
+
+def parse_bool(value)->bool:
+    "Form fields arrive as strings: 'True'/'False', 'true'/'false', '1'/'0', 'on'/'off', 'yes'/'no'."
+    if isinstance(value,bool):
+        return value
+    text=str(value).strip().lower()
+    if text in ("true","1","on","yes"):
+        return True
+    if text in ("false","0","off","no",""):
+        return False
+    raise ValueError(f"Cannot interpret {value!r} as a boolean")
+
+def parse_float(value)->float:
+    "float() also accepts 'nan' and 'inf', which the model cannot score: only finite numbers are valid."
+    number=float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+class FossilRecord:
+    """
+    Typed single fossil record for the record-oriented prediction path: the form values are converted once
+    to the training dtypes and the record is handed to MyModel.transform_predict as is, which writes it
+    straight into a preallocated model input row instead of building a DataFrame.
+    __slots__ keeps the record to 12 fixed attributes (no per-instance __dict__).
+    """
+    __slots__=("uranium_lead_ratio","carbon_14_ratio","radioactive_decay_series","stratigraphic_layer_depth",
+               "geological_period","paleomagnetic_data","inclusion_of_other_fossils","isotopic_composition",
+               "surrounding_rock_type","stratigraphic_position","fossil_size","fossil_weight")
+    FIELD_TYPES={"uranium_lead_ratio":parse_float,"carbon_14_ratio":parse_float,"radioactive_decay_series":parse_float,
+                 "stratigraphic_layer_depth":parse_float,"geological_period":str,"paleomagnetic_data":str,
+                 "inclusion_of_other_fossils":parse_bool,"isotopic_composition":parse_float,
+                 "surrounding_rock_type":str,"stratigraphic_position":str,"fossil_size":parse_float,"fossil_weight":parse_float}
+
+    def __init__(self,**values):
+        for name in self.__slots__:
+            if values.get(name) is None:
+                raise ValueError(f"Missing value for {name}")
+            try:
+                setattr(self,name,self.FIELD_TYPES[name](values[name]))
+            except (TypeError,ValueError):
+                raise ValueError(f"Invalid value {values[name]!r} for {name}") from None
+
+    @classmethod
+    def from_mapping(cls,mapping:Mapping)->"FossilRecord":
+        "Builds the record from a form or any mapping of the feature names (extra keys are ignored)."
+        return cls(**{name:mapping.get(name) for name in cls.__slots__})
+
+    def __getitem__(self,name:str):
+        "Record access by column name, as CompiledPreprocessor.transform_records expects."
+        return getattr(self,name)
+
+    def to_dict(self)->dict:
+        return {name:getattr(self,name) for name in self.__slots__}
+
+
+class FossilBatchPrediction:
+    """
+    Builds one DataFrame from a batch of fossil records so the whole batch goes through a single
+    MyModel.transform_predict call.
+
+    payload: either a JSON array of records ([{"uranium_lead_ratio": ..., ...}, ...]) or
+             columnar JSON ({"uranium_lead_ratio": [...], "carbon_14_ratio": [...], ...}).
+    """
+    ##static variable: schema file path -> (feature columns, numerical columns), read once per process
+    schema_columns:Dict[str,tuple]={}
+
+    def __init__(self,payload:Union[List[Dict],Dict[str,List]],schema_file_path:str=SCHEMA_FILE_PATH):
+        try:
+            self.payload=payload
+            if schema_file_path not in FossilBatchPrediction.schema_columns:
+                schema_config=read_yaml_file(schema_file_path)
+                FossilBatchPrediction.schema_columns[schema_file_path]=(
+                    [column for column in schema_config["columns"] if column!=TARGET_COLUMN],
+                    list(schema_config["numerical_columns"]))
+            self.feature_columns,self.numerical_columns=FossilBatchPrediction.schema_columns[schema_file_path]
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def get_fossil_input_dataframe(self)->DataFrame:
+        """
+        This function returns a dataframe with the schema feature columns for every record of the batch.
+        Numerical columns with a non-numeric or non-finite value are rejected.
+        """
+        try:
+            if isinstance(self.payload,list):
+                dataframe=DataFrame.from_records(self.payload)
+            elif isinstance(self.payload,dict):
+                dataframe=DataFrame(self.payload)
+            else:
+                raise ValueError("Batch payload must be a JSON array of records or a columnar JSON object.")
+            if dataframe.empty:
+                raise ValueError("Batch payload does not contain any record.")
+
+            missing_columns=[column for column in self.feature_columns if column not in dataframe.columns]
+            if len(missing_columns)>0:
+                raise ValueError(f"Batch payload is missing columns: {missing_columns}")
+            dataframe=dataframe[self.feature_columns].copy()
+            for column in self.numerical_columns:
+                try:
+                    values=to_numeric(dataframe[column],errors="raise").astype("float64")
+                except (TypeError,ValueError):
+                    raise ValueError(f"Non-numeric value in column {column}") from None
+                if not np.isfinite(values.to_numpy()).all():
+                    raise ValueError(f"Missing or non-finite value in column {column}")
+                dataframe[column]=values
+            return dataframe
+        except Exception as e:
+            raise MyException(e,sys)
+
             
 class FossilAgeRegression:
+    ##static variable: one prediction cache for the whole process, created on first use
+    prediction_cache:PredictionCache=None
+
     def __init__(self,prediction_pipeline_config:FossilPredictionConfig=FossilPredictionConfig(),)->None:
           try:
                self.predict_pipeline_config=prediction_pipeline_config
+               if FossilAgeRegression.prediction_cache is None:
+                    FossilAgeRegression.prediction_cache=PredictionCache(
+                         max_size=prediction_pipeline_config.prediction_cache_size,
+                         ttl_seconds=prediction_pipeline_config.prediction_cache_ttl)
           except Exception as e:
                raise MyException(e,sys)
           
-    def predict(self,dataframe)->str:
-         try:
-              model=FossilEstimator(
+    def get_estimator(self)->FossilEstimator:
+         "FossilEstimator serving the model of the configured store (S3 or local directory) from the process-wide ModelRegistry."
+         return FossilEstimator(
                    bucket_name=self.predict_pipeline_config.model_bucket_name,
                    model_path=self.predict_pipeline_config.model_file_path,
+                   cache_model=True,
+                   refresh_interval=self.predict_pipeline_config.model_refresh_interval,
+                   inference_engine=self.predict_pipeline_config.inference_engine,
+                   prediction_cache=FossilAgeRegression.prediction_cache,
+                   storage_backend=self.predict_pipeline_config.model_storage_backend,
+                   storage_dir=self.predict_pipeline_config.model_storage_dir,
               )
+
+    def warm_up(self,n_rows:int)->dict:
+         """
+         Loads the served model into the ModelRegistry (storage client, download, unpickle) and runs a synthetic batch
+         through both prediction paths (list of records, DataFrame) so that the first real request does not
+         pay the first-call costs. The warm-up bypasses the prediction cache.
+         Returns the duration (seconds) of each step.
+         """
+         try:
+              durations={}
+              started=time.perf_counter()
+              estimator=self.get_estimator()
+              cached_model=ModelRegistry.get_cached_model(estimator,refresh_interval=estimator.refresh_interval)
+              model=cached_model.model
+              durations["load_model"]=time.perf_counter()-started
+
+              compiled_preprocessor=getattr(model,"compiled_preprocessing_object",None)
+              if compiled_preprocessor is None:
+                   compiled_preprocessor=CompiledPreprocessor.from_pipeline(model.preprocessing_object,
+                                                                            read_yaml_file(SCHEMA_FILE_PATH))
+              records=compiled_preprocessor.sample_records(n_rows)
+              engine=self.predict_pipeline_config.inference_engine
+              for name,batch in (("records",[records[0]]),("records_batch",records),
+                                 ("dataframe",DataFrame.from_records(records))):
+                   started=time.perf_counter()
+                   model.transform_predict(batch,engine=engine)
+                   durations[name]=time.perf_counter()-started
+              logging.info(f"Model version {cached_model.version} warmed up: {durations}")
+              return {step:round(duration,4) for step,duration in durations.items()}
+         except Exception as e:
+              raise MyException(e,sys)
+
+    def predict(self,dataframe)->str:
+         try:
+              model=self.get_estimator()
               result=model.predict(dataframe)
               return result
          except Exception as e:
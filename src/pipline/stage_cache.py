@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import hashlib
+import inspect
+import dataclasses
+from typing import Dict, List, Optional, Type
+import pandas as pd
+from src.exception import MyException
+from src.logger import logging
+from src.constants import ARTIFACT_DIR, STAGE_CACHE_DIR_NAME
+from src.utils.main_utils import read_yaml_file, write_yaml_file
+
+"Content-addressed stage cache: a stage whose inputs did not change reuses the artifacts of a previous run."
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_FORCED = "forced"
+
+
+def hash_file(file_path: str) -> str:
+    "sha256 of a file's content (schema.yaml, component source code...)."
+    with open(file_path, "rb") as file_obj:
+        return hashlib.sha256(file_obj.read()).hexdigest()
+
+
+def hash_dataframe(dataframe: pd.DataFrame) -> str:
+    "sha256 of the columns and row values of a DataFrame, independent of its index."
+    digest = hashlib.sha256(json.dumps(list(map(str, dataframe.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(dataframe, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def config_values(config: object) -> Dict[str, object]:
+    """
+    The values of a *Config object that influence a stage's output. Artifact locations (*_dir/*_path fields)
+    change with every run's TIMESTAMP and are left out.
+    """
+    return {name: value for name, value in inspect.getmembers(config)
+            if not name.startswith("_") and not callable(value)
+            and not name.lower().endswith(("_dir", "_path"))}
+
+
+def source_files(*objects) -> List[str]:
+    "Hashes of the source files defining the given classes/functions: the code version of a stage."
+    return [hash_file(inspect.getsourcefile(obj)) for obj in objects]
+
+
+class StageCache:
+    """
+    StageCache fingerprints each stage from its inputs (upstream fingerprint or data hash, schema.yaml,
+    the relevant *Config values and the stage's source code) and keeps an index of the artifact produced
+    for every fingerprint under artifact/stage_cache/<stage>/<fingerprint>.yaml.
+
+    cache_dir: Location of the cache index.
+    force: Ignore cached artifacts and recompute every stage (the new artifacts are still recorded).
+    """
+    def __init__(self, cache_dir: str = os.path.join(ARTIFACT_DIR, STAGE_CACHE_DIR_NAME), force: bool = False):
+        self.cache_dir = cache_dir
+        self.force = force
+        self.fingerprints: Dict[str, str] = {}
+        self.report: Dict[str, str] = {}
+        self.pending: Dict[str, dict] = {}
+
+    def fingerprint(self, stage: str, **inputs) -> str:
+        "Computes (and remembers) the fingerprint of a stage from its inputs."
+        try:
+            payload = json.dumps(inputs, sort_keys=True, default=str)
+            fingerprint = hashlib.sha256(f"{stage}:{payload}".encode()).hexdigest()
+            self.fingerprints[stage] = fingerprint
+            return fingerprint
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _entry_file_path(self, stage: str) -> str:
+        return os.path.join(self.cache_dir, stage, f"{self.fingerprints[stage]}.yaml")
+
+    @staticmethod
+    def _artifact_files_exist(values: dict) -> bool:
+        for name, value in values.items():
+            if isinstance(value, dict):
+                if not StageCache._artifact_files_exist(value):
+                    return False
+            elif isinstance(value, str) and name.endswith(("_path", "_file")) and not os.path.exists(value):
+                return False
+        return True
+
+    @staticmethod
+    def _build_artifact(artifact_cls: Type, values: dict):
+        "Rebuilds the artifact dataclass (and nested artifact dataclasses) from the cached values."
+        kwargs = {}
+        for field in dataclasses.fields(artifact_cls):
+            value = values[field.name]
+            if dataclasses.is_dataclass(field.type) and isinstance(value, dict):
+                value = StageCache._build_artifact(field.type, value)
+            kwargs[field.name] = value
+        return artifact_cls(**kwargs)
+
+    def lookup(self, stage: str, artifact_cls: Type) -> Optional[object]:
+        "Returns the cached artifact for the stage's current fingerprint, None on a miss."
+        try:
+            if self.force:
+                self.report[stage] = CACHE_FORCED
+                return None
+            entry_file_path = self._entry_file_path(stage)
+            if os.path.exists(entry_file_path):
+                values = read_yaml_file(entry_file_path)
+                if values and self._artifact_files_exist(values):
+                    self.report[stage] = CACHE_HIT
+                    logging.info(f"Stage cache hit for {stage} ({self.fingerprints[stage][:12]})")
+                    return self._build_artifact(artifact_cls, values)
+            self.report[stage] = CACHE_MISS
+            return None
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def record(self, stage: str, artifact: object) -> None:
+        "Queues the artifact of a computed stage, written to the index by commit()."
+        if stage in self.fingerprints and self.report.get(stage) != CACHE_HIT:
+            self.pending[stage] = dataclasses.asdict(artifact)
+
+    def commit(self) -> None:
+        "Writes the queued entries; call it once the artifact files are on disk."
+        try:
+            for stage, values in self.pending.items():
+                write_yaml_file(self._entry_file_path(stage), values, replace=True)
+            self.pending.clear()
+        except Exception as e:
+            raise MyException(e, sys)
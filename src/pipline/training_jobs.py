@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import uuid
+import socket
+import sqlite3
+from datetime import datetime
+from typing import Optional
+from src.exception import MyException
+from src.logger import logging
+from src.constants import TRAINING_JOB_STORE_FILE_PATH
+
+"Training job subsystem: POST /train enqueues a TrainPipeline run and GET /train/{job_id} reports its progress."
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class TrainingJobConflictError(Exception):
+    """Raised when a training job is requested for a model that already has a queued or running job."""
+
+
+class TrainingJobStore:
+    """
+    SQLite backed store of training jobs. A new connection is opened per call so the store can be shared
+    by the API process and the training worker process through the same database file.
+
+    file_path: Location of the SQLite database file.
+    """
+    def __init__(self, file_path: str = TRAINING_JOB_STORE_FILE_PATH):
+        try:
+            self.file_path = file_path
+            dir_path = os.path.dirname(file_path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+            with self._connect() as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("""CREATE TABLE IF NOT EXISTS training_jobs (
+                                        job_id TEXT PRIMARY KEY,
+                                        model_name TEXT NOT NULL,
+                                        status TEXT NOT NULL,
+                                        stage TEXT,
+                                        created_at TEXT NOT NULL,
+                                        started_at TEXT,
+                                        finished_at TEXT,
+                                        stage_durations TEXT NOT NULL DEFAULT '{}',
+                                        artifacts TEXT NOT NULL DEFAULT '{}',
+                                        error TEXT,
+                                        owner_host TEXT,
+                                        owner_pid INTEGER)""")
+                ##stores created before jobs recorded the server process that owns them
+                columns = {row["name"] for row in connection.execute("PRAGMA table_info(training_jobs)")}
+                for column, column_type in (("owner_host", "TEXT"), ("owner_pid", "INTEGER")):
+                    if column not in columns:
+                        connection.execute(f"ALTER TABLE training_jobs ADD COLUMN {column} {column_type}")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.file_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().isoformat(timespec="seconds")
+
+    def create_job(self, model_name: str) -> str:
+        """
+        Creates a queued job and returns its id.
+        Raises TrainingJobConflictError if the model already has a queued or running job.
+        """
+        connection = self._connect()
+        try:
+            ##the write lock makes the check and the insert atomic across processes
+            connection.execute("BEGIN IMMEDIATE")
+            active = connection.execute(
+                f"SELECT job_id FROM training_jobs WHERE model_name=? AND status IN ({','.join('?' * len(ACTIVE_JOB_STATUSES))})",
+                (model_name, *ACTIVE_JOB_STATUSES)).fetchone()
+            if active is not None:
+                connection.execute("ROLLBACK")
+                raise TrainingJobConflictError(f"Training job {active['job_id']} is already active for model {model_name}.")
+            job_id = uuid.uuid4().hex
+            ##the server process owning the job: its training pool dies with it
+            connection.execute("""INSERT INTO training_jobs (job_id, model_name, status, created_at, owner_host, owner_pid)
+                                  VALUES (?, ?, ?, ?, ?, ?)""",
+                               (job_id, model_name, JOB_QUEUED, self._now(), socket.gethostname(), os.getpid()))
+            connection.execute("COMMIT")
+            logging.info(f"Training job {job_id} queued for model {model_name}")
+            return job_id
+        finally:
+            connection.close()
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        "Returns the job as a dictionary, None if the job id is unknown."
+        try:
+            with self._connect() as connection:
+                row = connection.execute("SELECT * FROM training_jobs WHERE job_id=?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            job["stage_durations"] = json.loads(job["stage_durations"])
+            job["artifacts"] = json.loads(job["artifacts"])
+            return job
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def start_stage(self, job_id: str, stage: str) -> None:
+        "Marks the job as running the given TrainPipeline stage."
+        try:
+            with self._connect() as connection:
+                connection.execute("""UPDATE training_jobs SET status=?, stage=?, started_at=COALESCE(started_at, ?)
+                                      WHERE job_id=?""", (JOB_RUNNING, stage, self._now(), job_id))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def finish_stage(self, job_id: str, stage: str, duration: float, artifact: Optional[dict]) -> None:
+        "Records the duration (seconds) and the resulting artifact of a finished stage."
+        try:
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                row = connection.execute("SELECT stage_durations, artifacts FROM training_jobs WHERE job_id=?",
+                                         (job_id,)).fetchone()
+                stage_durations = json.loads(row["stage_durations"])
+                artifacts = json.loads(row["artifacts"])
+                stage_durations[stage] = round(duration, 3)
+                if artifact is not None:
+                    artifacts[stage] = artifact
+                connection.execute("UPDATE training_jobs SET stage_durations=?, artifacts=? WHERE job_id=?",
+                                   (json.dumps(stage_durations), json.dumps(artifacts, default=str), job_id))
+                connection.execute("COMMIT")
+            finally:
+                connection.close()
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def finish_job(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        "Marks the job as succeeded or failed."
+        try:
+            with self._connect() as connection:
+                connection.execute("UPDATE training_jobs SET status=?, finished_at=?, error=? WHERE job_id=?",
+                                   (status, self._now(), error, job_id))
+            logging.info(f"Training job {job_id} {status}")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def owner_is_alive(owner_host: Optional[str], owner_pid: Optional[int]) -> bool:
+        """
+        Whether the server process that created a job is still running. Only processes of this host can be
+        checked, the jobs of another host are assumed alive. Called at server start-up, before this process
+        created any job: a job owned by our own pid comes from a previous server reusing the pid (e.g. pid 1
+        of a restarted container).
+        """
+        if owner_host is None or owner_pid is None:
+            return False
+        if owner_host != socket.gethostname():
+            return True
+        if owner_pid == os.getpid():
+            return False
+        try:
+            os.kill(owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def fail_interrupted_jobs(self) -> int:
+        """
+        Jobs left queued/running by a server process that is gone can never finish: mark them failed.
+        The jobs of sibling server processes (other uvicorn workers) that are still running are left alone.
+        """
+        try:
+            with self._connect() as connection:
+                active_jobs = connection.execute(
+                    f"""SELECT job_id, owner_host, owner_pid FROM training_jobs
+                        WHERE status IN ({','.join('?' * len(ACTIVE_JOB_STATUSES))})""",
+                    ACTIVE_JOB_STATUSES).fetchall()
+                interrupted = [(JOB_FAILED, self._now(), "Interrupted by a server restart.", job["job_id"])
+                               for job in active_jobs if not self.owner_is_alive(job["owner_host"], job["owner_pid"])]
+                connection.executemany("UPDATE training_jobs SET status=?, finished_at=?, error=? WHERE job_id=?",
+                                       interrupted)
+            if interrupted:
+                logging.info(f"Marked {len(interrupted)} interrupted training job(s) as failed")
+            return len(interrupted)
+        except Exception as e:
+            raise MyException(e, sys)
+
+def run_training_job(job_id: str, job_store_file_path: str = TRAINING_JOB_STORE_FILE_PATH, force: bool = False) -> None:
+    """
+    Entry point used to run a queued training job in a worker process. Progress is written to the job
+    store, so nothing but a RuntimeError (MyException cannot be pickled back) is returned to the parent.
+    force: Recompute every stage, ignoring the stage cache.
+    """
+    from src.pipline.training_pipeline import TrainPipeline
+    job_store = TrainingJobStore(job_store_file_path)
+    try:
+        TrainPipeline(job_store=job_store, job_id=job_id, force=force).run_pipeline()
+        job_store.finish_job(job_id, status=JOB_SUCCEEDED)
+    except Exception as e:
+        job_store.finish_job(job_id, status=JOB_FAILED, error=str(e))
+        raise RuntimeError(str(e)) from None
@@ -2,10 +2,21 @@
 
 import os
 import sys
+import time
+import argparse
+from dataclasses import asdict,is_dataclass
 from src.exception import MyException
 from src.logger import logging
+from src.entity.artifact_store import artifact_store
+from src.constants import SCHEMA_FILE_PATH,MODEL_CONFIG_FILE_PATH,STAGE_CACHE_REPORT_FILE_NAME
+from src.utils.main_utils import write_yaml_file
+from src.pipline.stage_cache import StageCache,hash_file,config_values,source_files
+from src.entity.estimator import MyModel
+from src.entity.compiled_model import CompiledTreeEnsemble
+from src.entity.compiled_preprocessor import CompiledPreprocessor
 
 ##For data ingestion pipeline setup
+from src.entity.config_entity import TrainingPipelineConfig
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.components.data_ingestion import DataIngestion
@@ -24,6 +35,8 @@ from src.components.data_transformation import DataTransformation
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import ModelTrainerArtifact
 from src.components.model_trainer import ModelTrainer
+from src.components.model_search import HyperparameterSearch
+from src.components.estimator_backends import build_estimator
 
 ##dependencies for model evaluation
 from src.entity.config_entity import ModelEvaluationConfig
@@ -38,9 +51,19 @@ from src.components.model_pusher import ModelPusher
 
 class TrainPipeline:
     """Initialze data ingestion configuration """
-    def __init__(self):
+    def __init__(self,job_store=None,job_id:str=None,force:bool=False):
         """initialise the Data ingestion configuration because it has 
-        required information about the data, it's naming and its location even it's artifacts name and folder"""
+        required information about the data, it's naming and its location even it's artifacts name and folder
+
+        job_store: Optional TrainingJobStore the current stage, stage durations and artifacts are reported to.
+        job_id: Id of the training job this run belongs to (required with job_store).
+        force: Recompute every stage even when the stage cache holds artifacts for the same inputs.
+        """
+        self.job_store=job_store
+        self.job_id=job_id
+        self.stage_durations={}
+        self.stage_cache=StageCache(force=force)
+        self.training_pipeline_config=TrainingPipelineConfig()
         self.data_ingestion_config=DataIngestionConfig()
         self.data_validation_config=DataValidationConfig() ##i spent a lot of time on this to debug due to my small mistake, cause i wrote DataValidationArtifact instead.
         self.data_transformation_config=DataTransformationConfig()
@@ -56,7 +79,7 @@ class TrainPipeline:
             logging.info("Entered the start_data_ingestion method of TrainPipeline class")
             logging.info("Getting the data from mongodb")
             data_ingestion=DataIngestion(data_ingestion_config=self.data_ingestion_config)
-            data_ingestion_artifact=data_ingestion.initiate_data_ingested()
+            data_ingestion_artifact=data_ingestion.initiate_data_ingested(stage_cache=self.stage_cache)
             logging.info("Got the train_set and test_set from mongodb")
             logging.info("Exited the start_data_ingestion method of TrainPipeline class")
             return data_ingestion_artifact
@@ -117,22 +140,77 @@ class TrainPipeline:
         except Exception as e:
             raise MyException(e,sys)
     
+    def run_stage(self,stage_name:str,stage_method,cache_inputs:dict=None,artifact_cls=None,**kwargs):
+        """
+        Runs one stage of the pipeline, timing it and reporting the stage and its artifact to the job store.
+        cache_inputs: inputs fingerprinting the stage, a previous artifact with the same fingerprint is reused.
+        artifact_cls: artifact dataclass rebuilt from the stage cache.
+        """
+        if self.job_store is not None:
+            self.job_store.start_stage(self.job_id,stage_name)
+        started=time.perf_counter()
+        artifact=None
+        if cache_inputs is not None:
+            self.stage_cache.fingerprint(stage_name,**cache_inputs)
+            artifact=self.stage_cache.lookup(stage_name,artifact_cls)
+        if artifact is None:
+            artifact=stage_method(**kwargs)
+            self.stage_cache.record(stage_name,artifact)
+        duration=time.perf_counter()-started
+        self.stage_durations[stage_name]=duration
+        logging.info(f"Stage {stage_name} completed in {duration:.2f}s")
+        if self.job_store is not None:
+            self.job_store.finish_stage(self.job_id,stage_name,duration=duration,
+                                        artifact=asdict(artifact) if is_dataclass(artifact) else None)
+        return artifact
+
     def run_pipeline(self,)->None:
         """
         This method of TrainPipeline class is responsible for running complete pipeline
         """
         try:
-            data_ingestion_artifact=self.start_data_ingestion()
-            data_validation_artifact=self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact=self.start_data_transformation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                        data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact=self.start_model_trainer(data_tranformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact=self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                  model_trainer_artifact=model_trainer_artifact)
-            if not model_evaluation_artifact.is_model_accepted:
-                return None
-            else:
-                model_pusher_artifact=self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            data_ingestion_artifact=self.run_stage("data_ingestion",self.start_data_ingestion)
+            schema_hash=hash_file(SCHEMA_FILE_PATH)
+            data_validation_artifact=self.run_stage("data_validation",self.start_data_validation,
+                                                    cache_inputs=dict(upstream=self.stage_cache.fingerprints["data_ingestion"],
+                                                                      schema=schema_hash,
+                                                                      code=source_files(DataValidation)),
+                                                    artifact_cls=DataValidationArtifact,
+                                                    data_ingestion_artifact=data_ingestion_artifact)
+            data_transformation_artifact=self.run_stage("data_transformation",self.start_data_transformation,
+                                                        cache_inputs=dict(upstream=self.stage_cache.fingerprints["data_validation"],
+                                                                          schema=schema_hash,
+                                                                          code=source_files(DataTransformation)),
+                                                        artifact_cls=DataTransformationArtifact,
+                                                        data_ingestion_artifact=data_ingestion_artifact,
+                                                        data_validation_artifact=data_validation_artifact)
+            model_trainer_artifact=self.run_stage("model_trainer",self.start_model_trainer,
+                                                  cache_inputs=dict(upstream=self.stage_cache.fingerprints["data_transformation"],
+                                                                    config=config_values(self.model_trainer_config),
+                                                                    model_config=hash_file(MODEL_CONFIG_FILE_PATH),
+                                                                    code=source_files(ModelTrainer,HyperparameterSearch,build_estimator,MyModel,CompiledTreeEnsemble,CompiledPreprocessor)),
+                                                  artifact_cls=ModelTrainerArtifact,
+                                                  data_tranformation_artifact=data_transformation_artifact)
+            model_evaluation_artifact=self.run_stage("model_evaluation",self.start_model_evaluation,
+                                                     data_ingestion_artifact=data_ingestion_artifact,
+                                                     model_trainer_artifact=model_trainer_artifact)
+            if model_evaluation_artifact.is_model_accepted:
+                model_pusher_artifact=self.run_stage("model_pusher",self.start_model_pusher,
+                                                     model_evaluation_artifact=model_evaluation_artifact)
+            ##every artifact file must be on disk before the run is reported as finished (and cached)
+            artifact_store.flush()
+            self.stage_cache.commit()
+            logging.info(f"Stage cache report: {self.stage_cache.report}")
+            write_yaml_file(os.path.join(self.training_pipeline_config.artifact_dir,STAGE_CACHE_REPORT_FILE_NAME),
+                            self.stage_cache.report)
         except Exception as e:
             raise MyException(e,sys)
-        
\ No newline at end of file
+        finally:
+            artifact_store.clear()
+
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description="Run the complete training pipeline.")
+    parser.add_argument("--force",action="store_true",help="recompute every stage, ignoring the stage cache")
+    args=parser.parse_args()
+    TrainPipeline(force=args.force).run_pipeline()
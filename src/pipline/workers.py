@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+from src.logger import logging
+from src.constants import INFERENCE_POOL_SIZE, INFERENCE_QUEUE_SIZE, TRAINING_POOL_SIZE, TRAINING_QUEUE_SIZE
+
+"Bounded worker pools that keep blocking inference and training work off the uvicorn event loop."
+
+class ExecutorBusyError(Exception):
+    """Raised when a BoundedExecutor already has `max_pending` tasks running or queued (mapped to HTTP 429)."""
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a hard limit on the number of running + queued tasks.
+
+    kind: "thread" for inference (sklearn releases the GIL in parts of predict), "process" for training.
+    max_workers: Size of the pool.
+    max_pending: Maximum number of tasks accepted at once, new tasks beyond it raise ExecutorBusyError.
+    name: Used for thread names and logging.
+    """
+    def __init__(self, kind: str, max_workers: int, max_pending: int, name: str):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.name = name
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        "The pool is created on first use so that importing the app never forks worker processes."
+        if self.executor is None:
+            with self.lock:
+                if self.executor is None:
+                    if self.kind == "thread":
+                        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                    else:
+                        ##spawned, single-use workers: every training run gets a fresh interpreter (and a fresh TIMESTAMP)
+                        self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                            mp_context=multiprocessing.get_context("spawn"),
+                                                            max_tasks_per_child=1)
+                    logging.info(f"Started {self.kind} pool {self.name} with {self.max_workers} workers")
+        return self.executor
+
+    def submit(self, fn: Callable, *args) -> Future:
+        "Submit fn(*args) to the pool, raising ExecutorBusyError when the pool is saturated."
+        if not self.slots.acquire(blocking=False):
+            raise ExecutorBusyError(f"{self.name} pool is busy ({self.max_pending} tasks pending), retry later.")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    async def run(self, fn: Callable, *args):
+        "Run fn(*args) in the pool and await the result without blocking the event loop."
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=wait)
+                self.executor = None
+
+
+inference_executor = BoundedExecutor(kind="thread", max_workers=INFERENCE_POOL_SIZE,
+                                     max_pending=INFERENCE_QUEUE_SIZE, name="inference")
+training_executor = BoundedExecutor(kind="process", max_workers=TRAINING_POOL_SIZE,
+                                    max_pending=TRAINING_QUEUE_SIZE, name="training")
@@ -0,0 +1,105 @@
+import sys
+import numpy as np
+from typing import Dict,Mapping,Sequence
+from src.exception import MyException
+
+"""Vectorized evaluation metrics: bootstrap confidence intervals and per-segment metrics computed from
+prediction vectors, so that one predict call per model is enough for thousands of resamples."""
+
+##point estimates of the regression metrics
+def regression_metrics(y_true: np.ndarray, y_pred: np.ndarray)->Dict[str,float]:
+    try:
+        y_true=np.asarray(y_true,dtype=np.float64)
+        y_pred=np.asarray(y_pred,dtype=np.float64)
+        sse=float(np.sum((y_true-y_pred)**2))
+        sst=float(np.sum((y_true-y_true.mean())**2))
+        return {"r2": 1-sse/sst if sst>0 else float("nan"), "mse": sse/len(y_true)}
+    except Exception as e:
+        raise MyException(e,sys)
+
+##cells of the (resamples, rows) count matrix built per chunk: ~32MB as int64 plus the float64 copy
+BOOTSTRAP_CHUNK_CELLS=4_000_000
+
+##bootstrap resampling as multinomial weights: resample b of the n rows counts[b, i] times
+def bootstrap_metric_samples(y_true: np.ndarray, y_preds: Mapping[str,np.ndarray], n_resamples: int,
+                             random_state: int=None, chunk_size: int=None,
+                             chunk_cells: int=BOOTSTRAP_CHUNK_CELLS)->Dict[str,Dict[str,np.ndarray]]:
+    """
+    R² and MSE of every model on the same n_resamples bootstrap resamples of the test set (paired resamples,
+    so the differences between models are bootstrapped too).
+    Each chunk of resamples is a (chunk_size, n) matrix of row counts, every metric is then a matrix-vector
+    product with the per-row squared errors: no resampled copy of the data is ever built.
+    chunk_size: resamples per chunk, by default chunk_cells // n so memory stays bounded on large test sets.
+    y_preds: model name -> prediction vector on the test set.
+    Returns model name -> {"r2": (n_resamples,) array, "mse": (n_resamples,) array}.
+    """
+    try:
+        y_true=np.asarray(y_true,dtype=np.float64)
+        n_samples=len(y_true)
+        names=list(y_preds)
+        ##one column per model, plus the centered target columns needed for the total sum of squares
+        squared_errors=np.column_stack([(y_true-np.asarray(y_preds[name],dtype=np.float64))**2 for name in names])
+        centered=y_true-y_true.mean()
+        target_moments=np.column_stack([centered,centered**2])
+
+        if chunk_size is None:
+            chunk_size=max(1,chunk_cells//max(n_samples,1))
+        rng=np.random.default_rng(random_state)
+        probabilities=np.full(n_samples,1/n_samples)
+        sse=np.empty((n_resamples,len(names)))
+        sst=np.empty(n_resamples)
+        for start in range(0,n_resamples,chunk_size):
+            stop=min(start+chunk_size,n_resamples)
+            counts=rng.multinomial(n_samples,probabilities,size=stop-start).astype(np.float64)
+            sse[start:stop]=counts@squared_errors
+            first,second=(counts@target_moments).T
+            sst[start:stop]=second-first**2/n_samples
+        with np.errstate(divide="ignore",invalid="ignore"):
+            r2=1-sse/sst[:,None]
+        return {name: {"r2": r2[:,index], "mse": sse[:,index]/n_samples} for index,name in enumerate(names)}
+    except Exception as e:
+        raise MyException(e,sys)
+
+##percentile confidence interval of bootstrap samples
+def confidence_interval(samples: np.ndarray, confidence: float)->Dict[str,float]:
+    try:
+        samples=np.asarray(samples,dtype=np.float64)
+        samples=samples[np.isfinite(samples)]
+        if samples.size==0:
+            ##e.g. R² of a constant-target test set: undefined on every resample
+            nan=float("nan")
+            return {"mean": nan, "std": nan, "lower": nan, "upper": nan}
+        alpha=(1-confidence)/2
+        lower,upper=np.quantile(samples,[alpha,1-alpha])
+        return {"mean": float(samples.mean()), "std": float(samples.std(ddof=1)),
+                "lower": float(lower), "upper": float(upper)}
+    except Exception as e:
+        raise MyException(e,sys)
+
+##metrics per value of each segment column
+def segment_metrics(y_true: np.ndarray, y_pred: np.ndarray,
+                    segments: Mapping[str,Sequence])->Dict[str,Dict[str,Dict[str,float]]]:
+    """
+    Count, R² and MSE of the rows of every segment value, computed for all the values of a column at once
+    with np.bincount over the value codes.
+    segments: column name -> values of that column for the test rows.
+    Returns column name -> segment value -> {"count", "r2", "mse"} (r2 is NaN for constant-target segments).
+    """
+    try:
+        y_true=np.asarray(y_true,dtype=np.float64)
+        squared_errors=(y_true-np.asarray(y_pred,dtype=np.float64))**2
+        report={}
+        for column,values in segments.items():
+            labels,codes=np.unique(np.asarray(values).astype(str),return_inverse=True)
+            counts=np.bincount(codes,minlength=len(labels)).astype(np.float64)
+            sse=np.bincount(codes,weights=squared_errors,minlength=len(labels))
+            means=np.bincount(codes,weights=y_true,minlength=len(labels))/counts
+            sst=np.bincount(codes,weights=(y_true-means[codes])**2,minlength=len(labels))
+            with np.errstate(divide="ignore",invalid="ignore"):
+                r2=np.where(sst>0,1-sse/sst,np.nan)
+            report[column]={str(label): {"count": int(counts[index]), "r2": float(r2[index]),
+                                         "mse": float(sse[index]/counts[index])}
+                            for index,label in enumerate(labels)}
+        return report
+    except Exception as e:
+        raise MyException(e,sys)
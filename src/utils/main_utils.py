@@ -1,8 +1,8 @@
 import os
 import sys
 import numpy as np
-import dill
-import yaml
+import pandas as pd
+from typing import List,Optional
 from pandas import DataFrame
 from src.logger import logging
 from src.exception import MyException
@@ -10,6 +10,7 @@ from src.exception import MyException
 ##method to read yaml file
 def read_yaml_file(file_path: str)->dict:
     try:
+        import yaml ##yaml and dill are imported on first use, the serving app does not need them at start-up
         with open(file_path, 'rb') as yaml_file:
             return yaml.safe_load(yaml_file)
     except Exception as e:
@@ -24,6 +25,7 @@ def write_yaml_file(file_path: str, content: object, replace: bool=False)-> None
             """This block of code is used to safely delete a file from the system if it exists"""
             if os.path.exists(file_path): #This checks whether a file (or directory) exists at the given path stored in file_path
                 os.remove(file_path) #If the file does exist, this line deletes it
+        import yaml
         os.makedirs(os.path.dirname(file_path),exist_ok=True)
         with open(file_path,"w") as file:
             yaml.dump(content,file)
@@ -34,6 +36,7 @@ def write_yaml_file(file_path: str, content: object, replace: bool=False)-> None
 def load_object(file_path: str)->object:
     """This method is responsible for loading the data. so object could be any thing like model,dataset, file etc."""
     try:
+        import dill
         with open(file_path,'rb') as file_obj:
             obj=dill.load(file_obj)
             return obj        
@@ -66,10 +69,63 @@ def load_numpy_array_data(file_path: str)->np.array:
 def save_object(file_path:str, obj:object)->None:
     logging.info("Saving object is started")
     try:
+        import dill
         dir_path=os.path.dirname(file_path) #file path name
         os.makedirs(dir_path,exist_ok=True) #create directory with file path name
         with open(file_path,'wb') as file_obj:
             dill.dump(obj,file_obj)
         logging.info("Object is save in the folder")
     except Exception as e:
-        raise MyException(e,sys)
\ No newline at end of file
+        raise MyException(e,sys)
+
+
+##dataframe artifacts: the format is picked from the file extension (.csv, .parquet or .feather)
+DATAFRAME_FILE_FORMATS=("csv","parquet","feather")
+
+def get_dataframe_file_format(file_path: str)->str:
+    file_format=os.path.splitext(file_path)[1].lstrip(".").lower()
+    if file_format not in DATAFRAME_FILE_FORMATS:
+        raise ValueError(f"Unsupported dataframe file format '{file_format}', expected one of {DATAFRAME_FILE_FORMATS}")
+    return file_format
+
+def save_dataframe(file_path: str, dataframe: DataFrame, categorical_columns: Optional[List[str]]=None)->None:
+    """Save a dataframe artifact in the format given by the file extension.
+    Parquet/Feather store the schema categorical columns as typed categoricals, so they are read back
+    without any text parsing."""
+    try:
+        file_format=get_dataframe_file_format(file_path)
+        os.makedirs(os.path.dirname(file_path),exist_ok=True)
+        if file_format=="csv":
+            dataframe.to_csv(file_path,index=False,header=True)
+            return
+        dataframe=dataframe.reset_index(drop=True)
+        if categorical_columns:
+            dataframe=dataframe.astype({column:"category" for column in categorical_columns if column in dataframe.columns})
+        if file_format=="parquet":
+            dataframe.to_parquet(file_path,index=False)
+        else:
+            dataframe.to_feather(file_path)
+    except Exception as e:
+        raise MyException(e,sys)
+
+def restore_bool_categories(dataframe: DataFrame)->DataFrame:
+    """Depending on the pyarrow version, a categorical of booleans (inclusion_of_other_fossils) comes back from
+    Parquet/Feather with float64 categories 0.0/1.0, which the fitted encoder does not know: cast them back to bool."""
+    for column in dataframe.columns:
+        values=dataframe[column]
+        if isinstance(values.dtype,pd.CategoricalDtype) and values.cat.categories.dtype.kind in "fiu" \
+                and len(values.cat.categories)>0 and values.cat.categories.isin([0,1]).all():
+            dataframe[column]=values.cat.rename_categories(values.cat.categories.astype(bool))
+    return dataframe
+
+def read_dataframe(file_path: str)->DataFrame:
+    """Read a dataframe artifact written by save_dataframe"""
+    try:
+        file_format=get_dataframe_file_format(file_path)
+        if file_format=="csv":
+            return pd.read_csv(file_path)
+        if file_format=="parquet":
+            return restore_bool_categories(pd.read_parquet(file_path))
+        return restore_bool_categories(pd.read_feather(file_path))
+    except Exception as e:
+        raise MyException(e,sys)